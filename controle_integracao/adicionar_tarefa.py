@@ -1,4 +1,7 @@
 # controle_integracao/adicionar_tarefa.py
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
 from PySide6 import QtWidgets, QtCore
 from PySide6.QtCore import Qt
 from . import integracao_db
@@ -33,6 +36,26 @@ QPushButton:hover {
 }
 """
 
+class _SaveSignals(QtCore.QObject):
+    finished = QtCore.Signal(object)
+    failed = QtCore.Signal(object)
+
+
+class _SaveWorker(QtCore.QRunnable):
+    def __init__(self, task):
+        super().__init__()
+        self._task = task
+        self.signals = _SaveSignals()
+
+    def run(self):  # executado fora da thread principal
+        try:
+            resultado = self._task()
+        except Exception as exc:
+            self.signals.failed.emit(exc)
+        else:
+            self.signals.finished.emit(resultado)
+
+
 class PopupAdicionarTarefa(QtWidgets.QDialog):
     def __init__(self, parent=None, on_save=None):
         super().__init__(parent)
@@ -43,30 +66,15 @@ class PopupAdicionarTarefa(QtWidgets.QDialog):
 
         self.on_save = on_save  # callback pra atualizar tabela depois
 
-        # pega dados auxiliares pra preencher combos
-        empresas = integracao_db.listar_empresas()
-        self.meses_existentes = integracao_db.listar_meses_existentes()
-        self.responsaveis = integracao_db.listar_responsaveis()
-
-        # prepara map helpers
-        # empresa -> lista de (cod, cod_athenas)
+        # combos nascem vazios; os dados do banco entram no _populate, depois
+        # que a janela já está na tela (ver showEvent)
+        self._populated = False
+        self.meses_existentes = []
+        self.responsaveis = []
         self.empresa_cod_map = {}
-        # cod -> {empresa, cod_athenas}
         self.map_por_cod = {}
-        # cod_athenas -> {empresa, cod}
         self.map_por_ath = {}
 
-        for e in empresas:
-            nome_emp = e["empresa"] or ""
-            cod_emp = e["cod"] or ""
-            ath_emp = e["cod_athenas"] or ""
-
-            self.empresa_cod_map.setdefault(nome_emp, []).append((cod_emp, ath_emp))
-            if cod_emp:
-                self.map_por_cod[cod_emp] = {"empresa": nome_emp, "cod_athenas": ath_emp}
-            if ath_emp:
-                self.map_por_ath[ath_emp] = {"empresa": nome_emp, "cod": cod_emp}
-
         layout_root = QtWidgets.QGridLayout(self)
 
         # coluna esquerda
@@ -75,22 +83,18 @@ class PopupAdicionarTarefa(QtWidgets.QDialog):
         lbl_empresa = QtWidgets.QLabel("Empresa:")
         self.cb_empresa = QtWidgets.QComboBox()
         self.cb_empresa.setEditable(True)
-        self.cb_empresa.addItems(sorted(self.empresa_cod_map.keys()))
 
         lbl_cod = QtWidgets.QLabel("Cód:")
         self.cb_cod = QtWidgets.QComboBox()
         self.cb_cod.setEditable(True)
-        self.cb_cod.addItems(sorted(self.map_por_cod.keys()))
 
         lbl_cod_ath = QtWidgets.QLabel("Cód Athenas:")
         self.cb_cod_ath = QtWidgets.QComboBox()
         self.cb_cod_ath.setEditable(True)
-        self.cb_cod_ath.addItems(sorted(self.map_por_ath.keys()))
 
         lbl_mes = QtWidgets.QLabel("Mês (YYYY-MM):")
         self.cb_mes = QtWidgets.QComboBox()
         self.cb_mes.setEditable(True)
-        self.cb_mes.addItems(self.meses_existentes)
 
         col_esq.addWidget(lbl_empresa)
         col_esq.addWidget(self.cb_empresa)
@@ -104,15 +108,21 @@ class PopupAdicionarTarefa(QtWidgets.QDialog):
         # coluna direita
         col_dir = QtWidgets.QVBoxLayout()
 
+        # P1 e P2 listam os mesmos responsáveis -> um modelo só pros dois
+        # (NoInsert p/ texto digitado num combo não aparecer no outro)
+        self._resp_model = QtCore.QStringListModel(self)
+
         lbl_p1 = QtWidgets.QLabel("P1:")
         self.cb_p1 = QtWidgets.QComboBox()
         self.cb_p1.setEditable(True)
-        self.cb_p1.addItems(self.responsaveis)
+        self.cb_p1.setInsertPolicy(QtWidgets.QComboBox.NoInsert)
+        self.cb_p1.setModel(self._resp_model)
 
         lbl_p2 = QtWidgets.QLabel("P2:")
         self.cb_p2 = QtWidgets.QComboBox()
         self.cb_p2.setEditable(True)
-        self.cb_p2.addItems(self.responsaveis)
+        self.cb_p2.setInsertPolicy(QtWidgets.QComboBox.NoInsert)
+        self.cb_p2.setModel(self._resp_model)
 
         lbl_tipo = QtWidgets.QLabel("Tipo / Obrigação:")
         self.cb_tipo = QtWidgets.QComboBox()
@@ -151,86 +161,163 @@ class PopupAdicionarTarefa(QtWidgets.QDialog):
         layout_root.addLayout(footer, 1, 0, 1, 2)
 
         # sinais de auto-preenchimento
-        self.cb_empresa.currentTextChanged.connect(self._empresa_changed)
+        # empresa: digitação dispara a cada tecla -> agrupa com debounce de 150ms
+        self._debounce = QtCore.QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(150)
+        self._debounce.timeout.connect(self._empresa_changed)
+        self.cb_empresa.editTextChanged.connect(lambda _texto: self._debounce.start())
         self.cb_cod.currentTextChanged.connect(self._cod_changed)
         self.cb_cod_ath.currentTextChanged.connect(self._ath_changed)
 
         self.btn_cancelar.clicked.connect(self.reject)
         self.btn_salvar.clicked.connect(self._salvar)
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._populated:
+            self._populated = True
+            # deixa a janela pintar primeiro; combos enchem no próximo ciclo
+            QtCore.QTimer.singleShot(0, self._populate)
+
+    def _populate(self):
+        # pega dados auxiliares pra preencher combos
+        # (as 3 consultas são independentes -> roda em paralelo, cada uma com
+        # sua própria conexão do pool, e espera só pela mais lenta; o
+        # integracao_db guarda as listas por alguns segundos (TTL), então
+        # reaberturas do popup normalmente nem vão ao banco)
+        with ThreadPoolExecutor(max_workers=3) as ex:
+            f_empresas = ex.submit(integracao_db.listar_empresas)
+            f_meses = ex.submit(integracao_db.listar_meses_existentes)
+            f_resp = ex.submit(integracao_db.listar_responsaveis)
+        self.meses_existentes = list(f_meses.result())
+        self.responsaveis = list(f_resp.result())
+
+        # maps e listas ordenadas montados uma vez no integracao_db (mesmos
+        # do PopupEditarTarefa) e guardados no cache junto com as empresas:
+        # empresa -> [(cod, cod_athenas)], cod / cod_athenas -> EmpRow
+        indices = integracao_db.indices_empresas(f_empresas.result())
+        self.empresa_cod_map = indices.empresa_cod_map
+        self.map_por_cod = indices.map_por_cod
+        self.map_por_ath = indices.map_por_ath
+
+        # empresas já vêm em ORDER BY empresa
+        self._sorted_empresas = list(self.empresa_cod_map)
+        self._sorted_cods = indices.cods
+        self._sorted_aths = indices.aths
+
+        self.cb_empresa.addItems(self._sorted_empresas)
+        # cod / cod_athenas podem ter milhares de entradas: em vez de
+        # popular o combo item a item, usa um completer sobre um modelo único
+        self.cb_cod.setCompleter(self._criar_completer(self._sorted_cods))
+        self.cb_cod_ath.setCompleter(self._criar_completer(self._sorted_aths))
+        self.cb_mes.addItems(self.meses_existentes)
+        self._resp_model.setStringList(self.responsaveis)
+
+    def _criar_completer(self, itens_ordenados):
+        completer = QtWidgets.QCompleter(QtCore.QStringListModel(itens_ordenados, self), self)
+        completer.setCompletionMode(QtWidgets.QCompleter.PopupCompletion)
+        # lista já vem ordenada -> Qt faz busca binária em vez de varrer tudo
+        completer.setModelSorting(QtWidgets.QCompleter.CaseSensitivelySortedModel)
+        return completer
+
+    @staticmethod
+    def _set_quietly(combo, text):
+        """Troca o texto do combo sem emitir sinais (evita cascata entre handlers)."""
+        combo.blockSignals(True)
+        idx = combo.findText(text)
+        if idx >= 0:
+            combo.setCurrentIndex(idx)
+        # setCurrentIndex é no-op quando o índice não muda (texto digitado
+        # fica pra trás) e não cobre texto fora da lista -> ajusta o edit
+        if combo.isEditable() and combo.currentText() != text:
+            combo.setEditText(text)
+        combo.blockSignals(False)
+
     def _empresa_changed(self):
-        emp = self.cb_empresa.currentText().strip()
+        emp = sys.intern(self.cb_empresa.currentText().strip())
         opcoes = self.empresa_cod_map.get(emp)
         if not opcoes:
             return
-        if len(opcoes) == 1:
-            cod, ath = opcoes[0]
-            self.cb_cod.setCurrentText(cod)
-            self.cb_cod_ath.setCurrentText(ath)
+        cods = [cod for cod, _ in opcoes]
+        athenas_list = [ath for _, ath in opcoes]
+        if len(cods) == 1:
+            self._set_quietly(self.cb_cod, cods[0])
+            self._set_quietly(self.cb_cod_ath, athenas_list[0])
         else:
-            cods = [c for c, _ in opcoes]
-            athenas_list = [a for _, a in opcoes]
+            # repopula sem disparar _cod_changed/_ath_changed a cada item
+            self.cb_cod.blockSignals(True)
+            self.cb_cod_ath.blockSignals(True)
             self.cb_cod.clear()
             self.cb_cod.addItems(cods)
-            self.cb_cod.setCurrentText(cods[0] if cods else "")
             self.cb_cod_ath.clear()
             self.cb_cod_ath.addItems(athenas_list)
-            self.cb_cod_ath.setCurrentText(athenas_list[0] if athenas_list else "")
+            self.cb_cod.blockSignals(False)
+            self.cb_cod_ath.blockSignals(False)
+            self._set_quietly(self.cb_cod, cods[0] if cods else "")
+            self._set_quietly(self.cb_cod_ath, athenas_list[0] if athenas_list else "")
 
     def _cod_changed(self):
-        c = self.cb_cod.currentText().strip()
+        c = sys.intern(self.cb_cod.currentText().strip())
         info = self.map_por_cod.get(c)
         if info:
-            self.cb_empresa.setCurrentText(info["empresa"])
-            self.cb_cod_ath.setCurrentText(info["cod_athenas"])
+            self._set_quietly(self.cb_empresa, info.empresa)
+            self._set_quietly(self.cb_cod_ath, info.ath)
 
     def _ath_changed(self):
-        a = self.cb_cod_ath.currentText().strip()
+        a = sys.intern(self.cb_cod_ath.currentText().strip())
         info = self.map_por_ath.get(a)
         if info:
-            self.cb_empresa.setCurrentText(info["empresa"])
-            self.cb_cod.setCurrentText(info["cod"])
+            self._set_quietly(self.cb_empresa, info.empresa)
+            self._set_quietly(self.cb_cod, info.cod)
 
     def _salvar(self):
+        # valida antes de ler o resto do formulário
         empresa_nome = self.cb_empresa.currentText().strip()
         cod = self.cb_cod.currentText().strip()
-        cod_ath = self.cb_cod_ath.currentText().strip()
-        mes = self.cb_mes.currentText().strip()
-        p1 = self.cb_p1.currentText().strip()
-        p2 = self.cb_p2.currentText().strip()
         tipo = self.cb_tipo.currentText().strip()
-        prioridade_tarefa = self.cb_prioridade.currentText().strip()
-        status = self.cb_status.currentText().strip()
 
         if not empresa_nome or not cod or not tipo:
             QtWidgets.QMessageBox.warning(self, "Aviso", "Preencha pelo menos Empresa, Cód e Tipo.")
             return
 
+        mes = self.cb_mes.currentText().strip()
+        prioridade_tarefa = self.cb_prioridade.currentText().strip()
+
         # regras gerais iniciais
         prioridade_empresa = "Média"
         top10_flag = 1 if prioridade_tarefa == "TOP 10" else 0
 
-        # 1. garantir empresa e pegar empresa_id
-        empresa_id = integracao_db.garantir_empresa(
+        # garante empresa + insere tarefa numa transação só, fora da thread
+        # da UI (Qt continua repintando enquanto o banco responde)
+        kwargs = dict(
             empresa_nome=empresa_nome,
             cod=cod,
-            cod_athenas=cod_ath,
+            cod_athenas=self.cb_cod_ath.currentText().strip(),
             prioridade_empresa=prioridade_empresa,
-            top10_flag=top10_flag
-        )
-
-        # 2. inserir tarefa
-        integracao_db.inserir_tarefa(
-            empresa_id=empresa_id,
+            top10_flag=top10_flag,
             mes=mes,
             tipo=tipo,
-            p1=p1,
-            p2=p2,
+            p1=self.cb_p1.currentText().strip(),
+            p2=self.cb_p2.currentText().strip(),
             prioridade_tarefa=prioridade_tarefa,
-            status=status
+            status=self.cb_status.currentText().strip(),
         )
-
+        self.btn_salvar.setEnabled(False)
+        self._save_worker = _SaveWorker(lambda: integracao_db.salvar_tarefa_completa(**kwargs))
+        self._save_worker.signals.finished.connect(self._on_salvo)
+        self._save_worker.signals.failed.connect(self._on_erro_salvar)
+        QtCore.QThreadPool.globalInstance().start(self._save_worker)
+
+    @QtCore.Slot(object)
+    def _on_salvo(self, resultado):
+        # o cache do integracao_db já foi invalidado pelo salvar_tarefa_completa
         QtWidgets.QMessageBox.information(self, "Sucesso", "Tarefa adicionada!")
         if self.on_save:
             self.on_save()
         self.accept()
+
+    @QtCore.Slot(object)
+    def _on_erro_salvar(self, erro):
+        self.btn_salvar.setEnabled(True)
+        QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao adicionar tarefa:\n{erro}")
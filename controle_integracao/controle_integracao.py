@@ -1,18 +1,38 @@
-import os, sys, logging
+import os, logging, threading
+from functools import partial
 from datetime import datetime
-import pandas as pd
+from importlib import resources
 from PySide6 import QtWidgets, QtCore, QtGui
-from PySide6.QtCore import Qt, QThread, Signal
+from PySide6.QtCore import Qt, QRunnable, QThreadPool, Signal, Slot
 from PySide6.QtWidgets import (
     QMainWindow, QTableWidget, QTableWidgetItem, QPushButton,
     QHBoxLayout, QVBoxLayout, QWidget, QDialog, QLabel,
     QComboBox, QMessageBox, QFileDialog
 )
-from controle_integracao.dao import TarefasDAO
+from controle_integracao.dao import (
+    TarefasDAO, COLUNAS_TAREFA, TID, EID, EMP, CODA, PRI, P1, P2, STATUS, TIPO,
+)
 
 # Caminho absoluto da pasta atual
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-sys.path.append(BASE_DIR)
+
+# Folha de estilo lida uma vez só na importação (em vez de abrir o .qss a
+# cada diálogo); localizada pelo pacote, não pelo cwd
+_STYLE_PATH = resources.files(__package__) / "styles.qss"
+_DEFAULT_QSS = """
+    QWidget { background-color: #10121B; color: white; font-family: 'Segoe UI'; }
+    QPushButton { background-color: #4ecca3; color: black; font-weight: bold; border-radius: 6px; }
+    QLabel { color: #4ecca3; font-weight: bold; }
+"""
+
+
+def _carregar_estilo(path):
+    if path.is_file():
+        return path.read_text(encoding="utf-8")
+    return _DEFAULT_QSS
+
+
+_STYLES_QSS = _carregar_estilo(_STYLE_PATH)
 
 # Garante a existência da pasta de logs
 os.makedirs(os.path.join(BASE_DIR, "logs"), exist_ok=True)
@@ -27,16 +47,79 @@ logging.basicConfig(
 # --------------------------
 # THREAD DE CARREGAMENTO
 # --------------------------
-class LoaderThread(QThread):
-    data_loaded = Signal(list)
+class _LoaderSignals(QtCore.QObject):
+    chunk_loaded = Signal(list)
+    finished = Signal()
+
+
+class LoaderRunnable(QRunnable):
+    """Carrega as tarefas no QThreadPool global (sem criar QThread por refresh).
+
+    As linhas chegam em blocos (``chunk_loaded``), então a tabela começa a ser
+    preenchida antes da consulta terminar.
+    """
+
+    def __init__(self, filtros=None):
+        super().__init__()
+        self.filtros = filtros
+        self.signals = _LoaderSignals()
+        self._cancelado = threading.Event()
+
+    def cancelar(self):
+        """Para a leitura no próximo bloco e devolve a conexão ao pool."""
+        self._cancelado.set()
 
     def run(self):
         try:
-            dados = TarefasDAO.listar_tarefas()
-            self.data_loaded.emit(dados)
+            for bloco in TarefasDAO.iter_tarefas(self.filtros, cancelado=self._cancelado):
+                if self._cancelado.is_set():
+                    break
+                self.signals.chunk_loaded.emit(bloco)
         except Exception as e:
             logging.error(f"Erro ao carregar tarefas: {e}")
-            self.data_loaded.emit([])
+        finally:
+            self.signals.finished.emit()
+
+
+# --------------------------
+# THREAD DE EXPORTAÇÃO
+# --------------------------
+class _ExportSignals(QtCore.QObject):
+    finished = Signal(bool, str)
+
+
+class ExportRunnable(QRunnable):
+    """Grava o .xlsx fora da thread da interface.
+
+    Usa as ``tarefas`` já carregadas na tela; só consulta o banco se vier ``None``.
+    """
+
+    def __init__(self, caminho, tarefas=None, filtros=None):
+        super().__init__()
+        self.caminho = caminho
+        self.tarefas = tarefas
+        self.filtros = filtros
+        self.signals = _ExportSignals()
+
+    def run(self):
+        try:
+            # pandas só é carregado quando alguém exporta (import pesado)
+            import pandas as pd
+
+            tarefas = self.tarefas
+            if tarefas is None:
+                tarefas = TarefasDAO.listar_tarefas(self.filtros)
+            df = pd.DataFrame.from_records(tarefas, columns=COLUNAS_TAREFA)
+            # xlsxwriter escreve bem mais rápido que o openpyxl (padrão);
+            # constant_memory grava linha a linha em vez de montar tudo na memória
+            with pd.ExcelWriter(self.caminho, engine="xlsxwriter",
+                                engine_kwargs={"options": {"constant_memory": True}}) as writer:
+                df.to_excel(writer, index=False)
+        except Exception as e:
+            logging.error(f"Erro exportar_excel: {e}")
+            self.signals.finished.emit(False, str(e))
+        else:
+            self.signals.finished.emit(True, self.caminho)
 
 
 # --------------------------
@@ -47,18 +130,6 @@ class FiltroDialog(QDialog):
         super().__init__(parent)
         self.setWindowTitle("Filtrar Tarefas")
 
-        # Aplica estilo
-        style_path = os.path.join(BASE_DIR, "styles.qss")
-        if os.path.exists(style_path):
-            with open(style_path, "r", encoding="utf-8") as f:
-                self.setStyleSheet(f.read())
-        else:
-            self.setStyleSheet("""
-                QWidget { background-color: #10121B; color: white; font-family: 'Segoe UI'; }
-                QPushButton { background-color: #4ecca3; color: black; font-weight: bold; border-radius: 6px; }
-                QLabel { color: #4ecca3; font-weight: bold; }
-            """)
-
         layout = QVBoxLayout(self)
 
         def linha_rotulo(texto, widget):
@@ -108,155 +179,138 @@ class FiltroDialog(QDialog):
             "mes": self.cb_mes.currentData()
         }
 
-    class AdicionarDialog(QDialog):
-        def __init__(self, parent=None):
-            super().__init__(parent)
-            self.setWindowTitle("Adicionar Tarefa")
-            self.setModal(True)
-            self._ok = False
-            self._dados = None
-
-            # estilo
-            style_path = os.path.join(os.path.dirname(__file__), "styles.qss")
-            if os.path.exists(style_path):
-                with open(style_path, "r", encoding="utf-8") as f:
-                    self.setStyleSheet(f.read())
-            else:
-                self.setStyleSheet("""
-                    QDialog { background-color: #10121B; color: white; }
-                    QLabel { color: #4ecca3; font-weight: bold; }
-                    QComboBox { background-color: #10121B; color: white; border: 1px solid #3a3f58; border-radius: 6px; padding: 6px; }
-                    QPushButton { background-color: #4ecca3; color: black; font-weight: bold; border-radius: 6px; padding: 6px 10px; }
-                    QPushButton#Voltar { background-color: #2a2f3a; color: white; border: 1px solid #3a3f58; }
-                """)
 
-            layout = QVBoxLayout(self)
-            layout.setContentsMargins(20, 20, 20, 16)
-            layout.setSpacing(10)
-
-            # --- Campos (empresas / meses / usuarios) ---
-            empresas = TarefasDAO.listar_empresas()
-            meses_existentes = TarefasDAO.listar_meses()
-            usuarios = TarefasDAO.listar_usuarios()
-
-            # Empresa
-            row_emp = QHBoxLayout()
-            row_emp.addWidget(QLabel("Empresa:"))
-            self.cb_empresa = QComboBox()
-            for emp in empresas:
-                self.cb_empresa.addItem(f"{emp['empresa']} ({emp['cod']})", emp)
-            row_emp.addWidget(self.cb_empresa)
-            layout.addLayout(row_emp)
-
-            # Mês (YYYY-MM)
-            from datetime import datetime
-            mes_atual = datetime.now().strftime("%Y-%m")
-            meses_combo = [mes_atual] + [m for m in meses_existentes if m != mes_atual]
-
-            row_mes = QHBoxLayout()
-            row_mes.addWidget(QLabel("Mês (YYYY-MM):"))
-            self.cb_mes = QComboBox()
-            for m in meses_combo:
-                self.cb_mes.addItem(m)
-            row_mes.addWidget(self.cb_mes)
-            layout.addLayout(row_mes)
-
-            # P1 / P2
-            row_p1 = QHBoxLayout()
-            row_p1.addWidget(QLabel("P1:"))
-            self.cb_p1 = QComboBox();
-            self.cb_p1.addItems(usuarios)
-            row_p1.addWidget(self.cb_p1)
-            layout.addLayout(row_p1)
-
-            row_p2 = QHBoxLayout()
-            row_p2.addWidget(QLabel("P2:"))
-            self.cb_p2 = QComboBox();
-            self.cb_p2.addItems(usuarios)
-            row_p2.addWidget(self.cb_p2)
-            layout.addLayout(row_p2)
-
-            # Tipo
-            row_tipo = QHBoxLayout()
-            row_tipo.addWidget(QLabel("Tipo / Obrigação:"))
-            self.cb_tipo = QComboBox();
-            self.cb_tipo.addItems(["GPS", "LFS", "TRI"])
-            row_tipo.addWidget(self.cb_tipo)
-            layout.addLayout(row_tipo)
-
-            # Prioridade
-            row_pri = QHBoxLayout()
-            row_pri.addWidget(QLabel("Prioridade:"))
-            self.cb_prioridade = QComboBox();
-            self.cb_prioridade.addItems(["TOP 10", "Alta", "Média", "Baixa"])
-            self.cb_prioridade.setCurrentText("Média")
-            row_pri.addWidget(self.cb_prioridade)
-            layout.addLayout(row_pri)
-
-            # Botões
-            btns = QHBoxLayout()
-            self.btn_voltar = QPushButton("Voltar");
-            self.btn_voltar.setObjectName("Voltar")
-            self.btn_salvar = QPushButton("Salvar")
-            btns.addStretch();
-            btns.addWidget(self.btn_voltar);
-            btns.addWidget(self.btn_salvar)
-            layout.addLayout(btns)
-
-            self.btn_voltar.clicked.connect(self.reject)
-            self.btn_salvar.clicked.connect(self._on_salvar)
-
-        def _on_salvar(self):
-            emp_info = self.cb_empresa.currentData()
-            if not emp_info:
-                QMessageBox.warning(self, "Aviso", "Selecione a empresa.")
-                return
-
-            dados = {
-                "empresa_id": emp_info["id"],
-                "mes": self.cb_mes.currentText().strip(),
-                "p1": self.cb_p1.currentText().strip(),
-                "p2": self.cb_p2.currentText().strip(),
-                "tipo": self.cb_tipo.currentText().strip(),
-                "prioridade": self.cb_prioridade.currentText().strip(),
-                "status": "Pendente"
-            }
-            if not dados["mes"]:
-                QMessageBox.warning(self, "Aviso", "Informe o mês (YYYY-MM).")
-                return
+# --------------------------
+# POPUP DE TAREFA (adicionar / editar)
+# --------------------------
+class TaskFormDialog(QDialog):
+    """Formulário de nova tarefa.
+
+    ``preloaded`` traz as listas já carregadas (``empresas``, ``meses``,
+    ``usuarios``), então o diálogo não consulta o banco.
+    """
+
+    PRIORIDADES = ["TOP 10", "Alta", "Média", "Baixa"]
+
+    def __init__(self, preloaded, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Adicionar Tarefa")
+        self.setModal(True)
+        self.resize(400, 300)
+        self._dados = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 16)
+        layout.setSpacing(10)
+
+        def linha_rotulo(texto, widget):
+            row = QHBoxLayout()
+            row.addWidget(QLabel(texto))
+            row.addWidget(widget)
+            layout.addLayout(row)
+
+        # Empresa
+        self.cb_empresa = QComboBox()
+        for emp in preloaded["empresas"]:
+            self.cb_empresa.addItem(f"{emp['empresa']} ({emp['cod']})", emp["id"])
+
+        # Mês (YYYY-MM), mês atual primeiro
+        mes_atual = datetime.now().strftime("%Y-%m")
+        self.cb_mes = QComboBox()
+        self.cb_mes.setEditable(True)
+        self.cb_mes.addItems([mes_atual] + [m for m in preloaded["meses"] if m != mes_atual])
+
+        # P1 / P2 (aceitam nome digitado fora da lista)
+        self.cb_p1 = QComboBox()
+        self.cb_p1.setEditable(True)
+        self.cb_p1.addItems(preloaded["usuarios"])
+        self.cb_p2 = QComboBox()
+        self.cb_p2.setEditable(True)
+        self.cb_p2.addItems(preloaded["usuarios"])
+
+        self.cb_tipo = QComboBox()
+        self.cb_tipo.addItems(["GPS", "LFS", "TRI"])
+
+        self.cb_prioridade = QComboBox()
+        self.cb_prioridade.addItems(self.PRIORIDADES)
+        self.cb_prioridade.setCurrentText("Média")
+
+        linha_rotulo("Empresa:", self.cb_empresa)
+        linha_rotulo("Mês (YYYY-MM):", self.cb_mes)
+        linha_rotulo("P1:", self.cb_p1)
+        linha_rotulo("P2:", self.cb_p2)
+        linha_rotulo("Tipo / Obrigação:", self.cb_tipo)
+        linha_rotulo("Prioridade:", self.cb_prioridade)
+
+        # Botões
+        btns = QHBoxLayout()
+        btn_voltar = QPushButton("Voltar")
+        btn_voltar.setObjectName("Voltar")
+        btn_salvar = QPushButton("Salvar")
+        btns.addStretch()
+        btns.addWidget(btn_voltar)
+        btns.addWidget(btn_salvar)
+        layout.addLayout(btns)
+
+        btn_voltar.clicked.connect(self.reject)
+        btn_salvar.clicked.connect(self._on_salvar)
 
-            self._ok = True
-            self._dados = dados
-            self.accept()
+    @Slot()
+    def _on_salvar(self):
+        dados = {
+            "empresa_id": self.cb_empresa.currentData(),
+            "mes": self.cb_mes.currentText().strip(),
+            "p1": self.cb_p1.currentText().strip(),
+            "p2": self.cb_p2.currentText().strip(),
+            "tipo": self.cb_tipo.currentText().strip(),
+            "prioridade": self.cb_prioridade.currentText().strip(),
+            "status": "Pendente"
+        }
+        if not dados["empresa_id"] or not dados["p1"] or not dados["p2"]:
+            QMessageBox.warning(self, "Aviso", "Preencha todos os campos obrigatórios!")
+            return
 
-        def result_ok(self):
-            return self._ok, self._dados
+        self._dados = dados
+        self.accept()
+
+    def get_data(self):
+        return self._dados
 
 
 # --------------------------
 # JANELA PRINCIPAL
 # --------------------------
 class ControleIntegracao(QMainWindow):
+    # criados uma vez só, e não a cada célula do populate
+    _BRUSH_OK = QtGui.QBrush(QtGui.QColor("#4ecca3"))
+    _BRUSH_PEND = QtGui.QBrush(QtGui.QColor("#ff5555"))
+    _TIPOS = ("GPS", "LFS", "TRI")
+    _TIPO_COL = {"GPS": 5, "LFS": 6, "TRI": 7}
+    _COL_TIPO = {col: tipo for tipo, col in _TIPO_COL.items()}
+
     def __init__(self, user):
         super().__init__()
         self.user = user
         self.filtros_atuais = None
         self.linhas_ids = []
+        # tuplas exibidas na tabela (mesma ordem das linhas); reaproveitadas na exportação
+        self._last_tarefas = None
+        # refreshes sobrepostos viram um só: se já está carregando, só marca
+        # que precisa recarregar de novo quando terminar
+        self._loading = False
+        self._reload_pending = False
+        self._primeiro_bloco = False
+        # cada carga recebe um número; blocos de uma carga descartada
+        # (troca de filtro no meio) chegam com número velho e são ignorados
+        self._geracao = 0
+        # carga em andamento (para poder cancelar numa troca de filtro)
+        self._loader = None
 
         self.setWindowTitle("Controle da Integração")
         self.setGeometry(250, 150, 1100, 600)
 
-        # Aplica estilo dark
-        style_path = os.path.join(BASE_DIR, "styles.qss")
-        if os.path.exists(style_path):
-            with open(style_path, "r", encoding="utf-8") as f:
-                self.setStyleSheet(f.read())
-        else:
-            self.setStyleSheet("""
-                QWidget { background-color: #10121B; color: white; font-family: 'Segoe UI'; }
-                QPushButton { background-color: #4ecca3; color: black; font-weight: bold; border-radius: 6px; }
-                QLabel { color: #4ecca3; font-weight: bold; }
-            """)
+        # Aplica estilo dark (só aqui: os diálogos filhos herdam do parent)
+        self.setStyleSheet(_STYLES_QSS)
 
         self._build_ui()
         self._load_data_async()
@@ -264,90 +318,197 @@ class ControleIntegracao(QMainWindow):
     # --------------------------
     # THREAD DE CARREGAMENTO
     # --------------------------
+    @Slot()
     def _load_data_async(self):
-        self.thread = LoaderThread()
-        self.thread.data_loaded.connect(self._populate_table)
-        self.thread.start()
+        if self._loading:
+            self._reload_pending = True
+            return
+        self._loading = True
+        self._primeiro_bloco = True
+        self._last_tarefas = None
+        self._geracao += 1
+        loader = self._loader = LoaderRunnable(self.filtros_atuais)
+        # partial não é QObject: QueuedConnection garante a entrega na thread da GUI
+        loader.signals.chunk_loaded.connect(partial(self._on_chunk_loaded, self._geracao), Qt.QueuedConnection)
+        loader.signals.finished.connect(partial(self._on_load_finished, self._geracao), Qt.QueuedConnection)
+        QThreadPool.globalInstance().start(loader)
+
+    def _recarregar_descartando(self):
+        """Começa uma carga nova já, cancelando a que estiver em andamento
+        (ela para de ler do banco; blocos já enviados são ignorados). Para
+        troca de filtros."""
+        if self._loading and self._loader is not None:
+            self._loader.cancelar()
+        self._loading = False
+        self._reload_pending = False
+        self._load_data_async()
+
+    def _on_chunk_loaded(self, geracao, tarefas):
+        if geracao != self._geracao:
+            return
+        if self._primeiro_bloco:
+            self._primeiro_bloco = False
+            self._populate_table(tarefas)
+        else:
+            self._append_rows(tarefas)
+
+    def _on_load_finished(self, geracao):
+        if geracao != self._geracao:
+            return
+        self._loading = False
+        if self._primeiro_bloco:
+            # nenhuma linha (ou erro): limpa a tabela
+            self._primeiro_bloco = False
+            self._populate_table([])
+        logging.info(f"{len(self.linhas_ids)} tarefas carregadas.")
+        if self._reload_pending:
+            self._reload_pending = False
+            self._load_data_async()
 
     # --------------------------
     # TABELA
     # --------------------------
+    @Slot(list)
     def _populate_table(self, tarefas):
         self.tabela.setRowCount(0)
         self.linhas_ids.clear()
+        self._last_tarefas = []
+        self._append_rows(tarefas)
+
+    def _append_rows(self, tarefas):
+        # preenche o bloco de uma vez: sem repintar/ordenar a cada linha
+        inicio = self.tabela.rowCount()
+        sorting = self.tabela.isSortingEnabled()
+        self.tabela.setSortingEnabled(False)
+        self.tabela.setUpdatesEnabled(False)
+        self.tabela.blockSignals(True)
+        self.tabela.setRowCount(inicio + len(tarefas))
+        try:
+            for row, t in enumerate(tarefas, start=inicio):
+                self._preencher_linha(row, t)
+                self.linhas_ids.append(t[EID])
+            self._last_tarefas.extend(tarefas)
+        finally:
+            self.tabela.blockSignals(False)
+            self.tabela.setUpdatesEnabled(True)
+            self.tabela.setSortingEnabled(sorting)
+
+    def _preencher_linha(self, row, t):
+        empresa_item = QTableWidgetItem(t[EMP])
+        empresa_item.setData(Qt.UserRole, t[TID])
+        empresa_item.setData(Qt.UserRole + 1, t[TIPO])
+
+        cols = [
+            empresa_item,
+            QTableWidgetItem(t[CODA] or ""),
+            QTableWidgetItem(t[PRI] or ""),
+            QTableWidgetItem(t[P1] or ""),
+            QTableWidgetItem(t[P2] or "")
+        ]
+        for col, item in enumerate(cols):
+            self.tabela.setItem(row, col, item)
+
+        # GPS, LFS, TRI coloridos: só a coluna do tipo da tarefa pode estar concluída
+        col_tipo = self._TIPO_COL.get(t[TIPO]) if t[STATUS] == "Concluída" else None
+        for c in (5, 6, 7):
+            self._set_status(row, c, "Concluída" if c == col_tipo else "Pendente")
+
+    def _set_status(self, row, col, status):
+        item = QTableWidgetItem(status)
+        item.setForeground(self._BRUSH_OK if status == "Concluída" else self._BRUSH_PEND)
+        self.tabela.setItem(row, col, item)
+
+    def _filtros_ativos(self):
+        return bool(self.filtros_atuais) and any(
+            v not in (None, "", "Todos") for v in self.filtros_atuais.values()
+        )
 
-        for t in tarefas:
-            row = self.tabela.rowCount()
-            self.tabela.insertRow(row)
-            empresa_item = QTableWidgetItem(t["empresa"])
-            empresa_item.setData(Qt.UserRole, t["tarefa_id"])
-            self.linhas_ids.append(t["empresa_id"])
-
-            cols = [
-                empresa_item,
-                QTableWidgetItem(t["cod_athenas"] or ""),
-                QTableWidgetItem(t["prioridade"] or ""),
-                QTableWidgetItem(t["p1"] or ""),
-                QTableWidgetItem(t["p2"] or "")
-            ]
-            for col, item in enumerate(cols):
-                self.tabela.setItem(row, col, item)
-
-            # GPS, LFS, TRI coloridos
-            for i, tipo in enumerate(["GPS", "LFS", "TRI"], start=5):
-                status = "Concluída" if t["tipo"] == tipo and t["status"] == "Concluída" else "Pendente"
-                cor = QtGui.QColor("#4ecca3") if status == "Concluída" else QtGui.QColor("#ff5555")
-                item = QTableWidgetItem(status)
-                item.setForeground(QtGui.QBrush(cor))
-                self.tabela.setItem(row, i, item)
-
-        logging.info(f"{len(tarefas)} tarefas carregadas.")
-        self.tabela.resizeColumnsToContents()
+    def _marcar_concluidas(self, empresa_id, tipos):
+        """Atualiza só as células afetadas, em vez de recarregar a tabela inteira."""
+        if self._loading:
+            # tabela/_last_tarefas ainda estão sendo montados em blocos:
+            # não dá pra mexer por índice, então pede uma carga nova
+            self._load_data_async()
+            return
+        sorting = self.tabela.isSortingEnabled()
+        self.tabela.setSortingEnabled(False)
+        for row, eid in enumerate(self.linhas_ids):
+            if eid != empresa_id:
+                continue
+            tipo = self.tabela.item(row, 0).data(Qt.UserRole + 1)
+            if tipo in tipos and tipo in self._TIPO_COL:
+                self._set_status(row, self._TIPO_COL[tipo], "Concluída")
+                t = self._last_tarefas[row]
+                self._last_tarefas[row] = t[:STATUS] + ("Concluída",) + t[STATUS + 1:]
+        self.tabela.setSortingEnabled(sorting)
 
     # --------------------------
     # FUNÇÕES DE BANCO
     # --------------------------
+    def _lookup_cache(self):
+        """Empresas / meses / usuários para os diálogos (DAO já memoiza com TTL)."""
+        return TarefasDAO.listas_apoio()
+
+    @Slot()
     def abrir_filtro(self):
-        dlg = FiltroDialog(
-            parent=self,
-            empresas=TarefasDAO.listar_empresas(),
-            meses=TarefasDAO.listar_meses()
-        )
+        lookups = self._lookup_cache()
+        dlg = FiltroDialog(parent=self, empresas=lookups["empresas"], meses=lookups["meses"])
         if dlg.exec() == QDialog.Accepted:
             self.filtros_atuais = dlg.get_filtros()
-            tarefas = TarefasDAO.listar_tarefas(self.filtros_atuais)
-            self._populate_table(tarefas)
+            self._recarregar_descartando()
 
+    @Slot()
     def limpar_filtros(self):
         self.filtros_atuais = None
-        self._load_data_async()
+        self._recarregar_descartando()
 
+    @Slot()
     def exportar_excel(self):
         caminho, _ = QFileDialog.getSaveFileName(
             self, "Salvar planilha", "controle_integracao.xlsx", "Excel (*.xlsx)"
         )
         if not caminho:
             return
-        tarefas = TarefasDAO.listar_tarefas(self.filtros_atuais)
-        try:
-            pd.DataFrame(tarefas).to_excel(caminho, index=False)
+
+        self._export_progress = QtWidgets.QProgressDialog("Exportando planilha...", None, 0, 0, self)
+        self._export_progress.setWindowTitle("Exportar Excel")
+        self._export_progress.setWindowModality(Qt.WindowModal)
+        self._export_progress.setMinimumDuration(0)
+        self._export_progress.show()
+
+        # exporta o que está na tela (sem nova consulta); durante uma carga
+        # a lista ainda está incompleta, então o runnable consulta o banco
+        tarefas = None if self._loading or self._last_tarefas is None else list(self._last_tarefas)
+        runnable = ExportRunnable(caminho, tarefas, self.filtros_atuais)
+        runnable.signals.finished.connect(self._on_export_finished)
+        QThreadPool.globalInstance().start(runnable)
+
+    @Slot(bool, str)
+    def _on_export_finished(self, ok, mensagem):
+        self._export_progress.close()
+        if ok:
             QMessageBox.information(self, "Sucesso", "Planilha exportada!")
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", str(e))
-            logging.error(f"Erro exportar_excel: {e}")
+        else:
+            QMessageBox.critical(self, "Erro", mensagem)
 
+    @Slot()
     def concluir_tarefa(self):
         linha = self.tabela.currentRow()
         col = self.tabela.currentColumn()
-        if linha < 0 or col not in [5, 6, 7]:
+        if linha < 0 or col not in self._COL_TIPO:
             QMessageBox.warning(self, "Aviso", "Selecione GPS, LFS ou TRI.")
             return
         empresa_id = self.linhas_ids[linha]
-        tipo = {5: "GPS", 6: "LFS", 7: "TRI"}[col]
+        tipo = self._COL_TIPO[col]
         if QMessageBox.question(self, "Confirmar", f"Concluir {tipo}?", QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
             TarefasDAO.concluir_tarefa(empresa_id, tipo)
-            self._load_data_async()
+            # com filtro de status a linha pode sair da lista: aí recarrega
+            if self._filtros_ativos():
+                self._load_data_async()
+            else:
+                self._marcar_concluidas(empresa_id, {tipo})
 
+    @Slot()
     def concluir_todas(self):
         linha = self.tabela.currentRow()
         if linha < 0:
@@ -355,10 +516,13 @@ class ControleIntegracao(QMainWindow):
             return
         empresa_id = self.linhas_ids[linha]
         if QMessageBox.question(self, "Confirmar", "Concluir todas as obrigações?", QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
-            for tipo in ["GPS", "LFS", "TRI"]:
-                TarefasDAO.concluir_tarefa(empresa_id, tipo)
-            self._load_data_async()
+            TarefasDAO.concluir_tarefas_empresa(empresa_id, self._TIPOS)
+            if self._filtros_ativos():
+                self._load_data_async()
+            else:
+                self._marcar_concluidas(empresa_id, self._TIPOS)
 
+    @Slot()
     def excluir_tarefa(self):
         linha = self.tabela.currentRow()
         if linha < 0:
@@ -367,92 +531,47 @@ class ControleIntegracao(QMainWindow):
         tarefa_id = self.tabela.item(linha, 0).data(Qt.UserRole)
         if QMessageBox.question(self, "Confirmar", "Excluir esta tarefa?", QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
             linhas = TarefasDAO.excluir_tarefa(tarefa_id)
-            if linhas:
+            if linhas and self._loading:
+                # carga em andamento: a linha some na recarga
+                self._load_data_async()
+                QMessageBox.information(self, "Sucesso", "Tarefa excluída.")
+            elif linhas:
+                self.tabela.removeRow(linha)
+                del self.linhas_ids[linha]
+                del self._last_tarefas[linha]
                 QMessageBox.information(self, "Sucesso", "Tarefa excluída.")
-            self._load_data_async()
 
     # --------------------------
     # Adicionar nova tarefa
     # --------------------------
+    @Slot()
     def abrir_add(self):
-        dlg = QDialog(self)
-        dlg.setWindowTitle("Adicionar Tarefa")
-        dlg.setModal(True)
-        dlg.resize(400, 300)
-
-        style_path = os.path.join(os.path.dirname(__file__), "styles.qss")
-        if os.path.exists(style_path):
-            with open(style_path, "r", encoding="utf-8") as f:
-                dlg.setStyleSheet(f.read())
-        else:
-            dlg.setStyleSheet("""
-                QDialog { background-color: #10121B; color: white; }
-                QLabel { color: #4ecca3; font-weight: bold; }
-                QPushButton { background-color: #4ecca3; color: black; font-weight: bold; border-radius: 6px; }
-            """)
-
-        layout = QVBoxLayout(dlg)
-        layout.setSpacing(10)
-        layout.setContentsMargins(20, 20, 20, 15)
-
-        # ===== CAMPOS =====
-        lbl_empresa = QLabel("Empresa:")
-        cb_empresa = QComboBox()
-        empresas = TarefasDAO.listar_empresas()
-        for emp in empresas:
-            cb_empresa.addItem(f"{emp['empresa']} ({emp['cod']})", emp["id"])
-
-        lbl_prioridade = QLabel("Prioridade:")
-        cb_prioridade = QComboBox()
-        cb_prioridade.addItems(["Baixa", "Média", "Alta", "TOP 10"])
-
-        lbl_p1 = QLabel("Responsável P1:")
-        txt_p1 = QtWidgets.QLineEdit()
-        lbl_p2 = QLabel("Responsável P2:")
-        txt_p2 = QtWidgets.QLineEdit()
-
-        lbl_tipo = QLabel("Tipo:")
-        cb_tipo = QComboBox()
-        cb_tipo.addItems(["GPS", "LFS", "TRI"])
-
-        for w in [lbl_empresa, cb_empresa, lbl_prioridade, cb_prioridade,
-                  lbl_p1, txt_p1, lbl_p2, txt_p2, lbl_tipo, cb_tipo]:
-            layout.addWidget(w)
-
-        # ===== BOTÕES =====
-        btns = QHBoxLayout()
-        btn_voltar = QPushButton("Voltar")
-        btn_salvar = QPushButton("Salvar")
-        btns.addStretch()
-        btns.addWidget(btn_voltar)
-        btns.addWidget(btn_salvar)
-        layout.addLayout(btns)
-
-        btn_voltar.clicked.connect(dlg.reject)
-
-        def salvar():
-            empresa_id = cb_empresa.currentData()
-            prioridade = cb_prioridade.currentText()
-            p1 = txt_p1.text().strip()
-            p2 = txt_p2.text().strip()
-            tipo = cb_tipo.currentText()
-
-            if not empresa_id or not p1 or not p2:
-                QMessageBox.warning(dlg, "Aviso", "Preencha todos os campos obrigatórios!")
-                return
-
-            try:
-                TarefasDAO.adicionar_tarefa(empresa_id, prioridade, p1, p2, tipo)
-                QMessageBox.information(dlg, "Sucesso", "Tarefa adicionada com sucesso!")
-                dlg.accept()
-                self._load_data_async()
-            except Exception as e:
-                logging.error(f"Erro ao adicionar tarefa: {e}")
-                QMessageBox.critical(dlg, "Erro", str(e))
+        dlg = TaskFormDialog(self._lookup_cache(), parent=self)
+        if dlg.exec() != QDialog.Accepted:
+            return
 
-        btn_salvar.clicked.connect(salvar)
+        try:
+            tarefa_id = TarefasDAO.inserir_tarefa(dlg.get_data())
+        except Exception as e:
+            logging.error(f"Erro ao adicionar tarefa: {e}")
+            QMessageBox.critical(self, "Erro", str(e))
+            return
 
-        dlg.exec()
+        QMessageBox.information(self, "Sucesso", "Tarefa adicionada com sucesso!")
+        # com filtro ativo ou carga em andamento, recarrega em vez de
+        # inserir a linha por índice
+        nova = None if self._filtros_ativos() or self._loading else TarefasDAO.obter_tarefa(tarefa_id)
+        if nova:
+            # mais recente primeiro, igual ao ORDER BY atualizado_em DESC
+            sorting = self.tabela.isSortingEnabled()
+            self.tabela.setSortingEnabled(False)
+            self.tabela.insertRow(0)
+            self._preencher_linha(0, nova)
+            self.linhas_ids.insert(0, nova[EID])
+            self._last_tarefas.insert(0, nova)
+            self.tabela.setSortingEnabled(sorting)
+        else:
+            self._load_data_async()
 
     # --------------------------
     # INTERFACE
@@ -498,7 +617,12 @@ class ControleIntegracao(QMainWindow):
         ])
         self.tabela.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.tabela.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
-        self.tabela.horizontalHeader().setStretchLastSection(True)
+        # largura das colunas definida uma vez aqui, em vez de
+        # resizeColumnsToContents() a cada carga: Empresa ocupa o espaço livre
+        header = self.tabela.horizontalHeader()
+        header.setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        for c in range(1, 8):
+            header.setSectionResizeMode(c, QtWidgets.QHeaderView.ResizeToContents)
         self.tabela.verticalHeader().setVisible(False)
         self.tabela.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         self.tabela.setStyleSheet("""
@@ -1,5 +1,8 @@
 # dao.py
+import threading
+import time
 from contextlib import contextmanager
+from itertools import combinations
 from database import conectar
 
 
@@ -7,81 +10,213 @@ from database import conectar
 # Context manager para conexão
 # -----------------------------
 @contextmanager
-def db_cursor(dictionary=True, commit=False):
-    conn = conectar()
-    cur = conn.cursor(dictionary=dictionary)
-    try:
-        yield cur
-        if commit:
-            conn.commit()
-    except Exception as e:
-        conn.rollback()
-        print(f"[DAO ERRO] {e}")
-        raise
-    finally:
-        cur.close()
-        conn.close()
+def db_cursor(dictionary=True, commit=False, buffered=None):
+    # conectar() devolve um handle do pool: o "with" pega a conexão
+    # e o close() no __exit__ só a devolve ao pool (sem novo handshake)
+    with conectar() as conn:
+        # buffered=False: cursor em streaming (linhas vêm do servidor sob demanda)
+        cur = conn.cursor(dictionary=dictionary, buffered=buffered)
+        try:
+            yield cur
+            if commit:
+                conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"[DAO ERRO] {e}")
+            raise
+        finally:
+            # gerador abandonado no meio (carga cancelada): descarta o resto
+            # do resultado sem buffer, senão o close() acusa "Unread result"
+            conn.consume_results()
+            cur.close()
+
+
+# -----------------------------
+# Cache com TTL das listas de apoio (empresas / usuários / meses)
+# -----------------------------
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _cache_get(key):
+    """Valor ainda válido no cache, ou None."""
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and hit[0] > time.monotonic():
+            return hit[1]
+    return None
+
+
+def _cache_set(key, ttl, valor):
+    with _cache_lock:
+        _cache[key] = (time.monotonic() + ttl, valor)
+
+
+def _cached(key, ttl, fn):
+    valor = _cache_get(key)
+    if valor is None:
+        # consulta fora do lock para não travar as outras threads
+        valor = fn()
+        _cache_set(key, ttl, valor)
+    return valor
+
+
+def _com_cursor(fn):
+    with db_cursor() as cur:
+        return fn(cur)
+
+
+def invalidar_cache(*keys):
+    """Sem argumentos limpa tudo; ex.: invalidar_cache("empresas") após mexer em empresas."""
+    with _cache_lock:
+        if not keys:
+            _cache.clear()
+        for key in keys:
+            _cache.pop(key, None)
 
 
 # -----------------------------
 # Classe DAO das tarefas
 # -----------------------------
+# As tarefas vêm como tuplas, na ordem do SELECT abaixo (sem dict por linha):
+COLUNAS_TAREFA = (
+    "tarefa_id", "empresa_id", "empresa", "cod", "cod_athenas",
+    "prioridade", "p1", "p2", "status", "tipo", "mes", "atualizado_em",
+)
+TID, EID, EMP, COD, CODA, PRI, P1, P2, STATUS, TIPO, MES, ATU = range(12)
+
+_SELECT_TAREFAS = """
+    SELECT
+        t.id AS tarefa_id, e.id AS empresa_id,
+        e.empresa, e.cod, e.cod_athenas,
+        t.prioridade_tarefa AS prioridade, t.p1, t.p2,
+        t.status, t.tipo, t.mes, t.atualizado_em
+    FROM tarefas_integracao t
+    JOIN empresas_integracao e ON e.id = t.empresa_id
+    WHERE 1=1
+"""
+
+# (chave do filtro, coluna) — filtra em t.* (índices de tarefas_integracao)
+_FILTROS_TAREFAS = (
+    ("empresa_id", "t.empresa_id"),
+    ("status", "t.status"),
+    ("tipo", "t.tipo"),
+    ("mes", "t.mes"),
+)
+
+
+def _montar_variantes():
+    # as 16 combinações (2^4) de filtros ativos, montadas uma vez na importação
+    variantes = {}
+    for n in range(len(_FILTROS_TAREFAS) + 1):
+        for ativos in combinations(_FILTROS_TAREFAS, n):
+            sql = _SELECT_TAREFAS + "".join(f" AND {coluna} = %s" for _, coluna in ativos)
+            variantes[frozenset(chave for chave, _ in ativos)] = sql + " ORDER BY t.atualizado_em DESC"
+    return variantes
+
+
+_SQL_VARIANTS = _montar_variantes()
+
+
 class TarefasDAO:
+    @staticmethod
+    def _sql_tarefas(filtros=None):
+        # o SQL só depende de QUAIS filtros estão ativos: texto fixo por
+        # combinação, montado uma vez na importação; params na ordem fixa
+        if not filtros:
+            return _SQL_VARIANTS[frozenset()], []
+        ativos = [chave for chave, _ in _FILTROS_TAREFAS
+                  if filtros.get(chave) and filtros[chave] != "Todos"]
+        return _SQL_VARIANTS[frozenset(ativos)], [filtros[chave] for chave in ativos]
+
     @staticmethod
     def listar_tarefas(filtros=None):
-        base = """
-            SELECT
-                t.id AS tarefa_id, e.id AS empresa_id,
-                e.empresa, e.cod, e.cod_athenas,
-                t.prioridade_tarefa AS prioridade, t.p1, t.p2,
-                t.status, t.tipo, t.mes, t.atualizado_em
-            FROM tarefas_integracao t
-            JOIN empresas_integracao e ON e.id = t.empresa_id
-            WHERE 1=1
-        """
-        params = []
-        if filtros:
-            if filtros.get("empresa_id") and filtros["empresa_id"] != "Todos":
-                base += " AND e.id = %s"; params.append(filtros["empresa_id"])
-            if filtros.get("status") and filtros["status"] != "Todos":
-                base += " AND t.status = %s"; params.append(filtros["status"])
-            if filtros.get("tipo") and filtros["tipo"] != "Todos":
-                base += " AND t.tipo = %s"; params.append(filtros["tipo"])
-            if filtros.get("mes") and filtros["mes"] != "Todos":
-                base += " AND t.mes = %s"; params.append(filtros["mes"])
-        base += " ORDER BY t.atualizado_em DESC"
-
-        with db_cursor() as cur:
+        base, params = TarefasDAO._sql_tarefas(filtros)
+        with db_cursor(dictionary=False) as cur:
             cur.execute(base, params)
             return cur.fetchall()
 
+    @staticmethod
+    def iter_tarefas(filtros=None, tamanho=500, cancelado=None):
+        """Gera as tarefas em blocos de ``tamanho`` linhas, sem carregar tudo na memória.
+
+        O cursor fica aberto até o gerador ser consumido por completo, ou até
+        ``cancelado`` (um ``threading.Event``) ser ligado: aí para no próximo
+        bloco e fecha o cursor.
+        """
+        base, params = TarefasDAO._sql_tarefas(filtros)
+        with db_cursor(dictionary=False, buffered=False) as cur:
+            cur.execute(base, params)
+            while cancelado is None or not cancelado.is_set():
+                bloco = cur.fetchmany(tamanho)
+                if not bloco:
+                    break
+                yield bloco
+
+    @staticmethod
+    def obter_tarefa(tarefa_id):
+        """Mesma linha de listar_tarefas, só que de uma tarefa (para atualizar a tabela sem recarregar)."""
+        with db_cursor(dictionary=False) as cur:
+            cur.execute(_SELECT_TAREFAS + " AND t.id = %s", (tarefa_id,))
+            return cur.fetchone()
+
     @staticmethod
     def listar_empresas():
-        with db_cursor() as cur:
-            cur.execute("""
-                SELECT id, empresa, cod, cod_athenas,
-                       prioridade_empresa, top10
-                FROM empresas_integracao
-                ORDER BY empresa ASC
-            """)
-            return cur.fetchall()
+        return _cached("empresas", 60, lambda: _com_cursor(TarefasDAO._listar_empresas))
+
+    @staticmethod
+    def _listar_empresas(cur):
+        cur.execute("""
+            SELECT id, empresa, cod, cod_athenas,
+                   prioridade_empresa, top10
+            FROM empresas_integracao
+            ORDER BY empresa ASC
+        """)
+        return cur.fetchall()
 
     @staticmethod
     def listar_usuarios():
-        with db_cursor() as cur:
-            cur.execute("SELECT nome FROM usuarios ORDER BY nome ASC")
-            return [r["nome"] for r in cur.fetchall()]
+        return _cached("usuarios", 60, lambda: _com_cursor(TarefasDAO._listar_usuarios))
+
+    @staticmethod
+    def _listar_usuarios(cur):
+        cur.execute("SELECT nome FROM usuarios ORDER BY nome ASC")
+        return [r["nome"] for r in cur.fetchall()]
 
     @staticmethod
     def listar_meses():
-        with db_cursor(dictionary=False) as cur:
-            cur.execute("""
-                SELECT DISTINCT mes
-                FROM tarefas_integracao
-                WHERE mes <> ''
-                ORDER BY mes DESC
-            """)
-            return [m[0] for m in cur.fetchall()]
+        return _cached("meses", 60, lambda: _com_cursor(TarefasDAO._listar_meses))
+
+    @staticmethod
+    def _listar_meses(cur):
+        cur.execute("""
+            SELECT DISTINCT mes
+            FROM tarefas_integracao
+            WHERE mes <> ''
+            ORDER BY mes DESC
+        """)
+        return [r["mes"] for r in cur.fetchall()]
+
+    @staticmethod
+    def listas_apoio():
+        """Empresas, meses e usuários para os diálogos, de uma vez.
+
+        O que ainda está no cache não vai ao banco; o que faltar é lido em
+        sequência numa conexão só.
+        """
+        leitores = {
+            "empresas": TarefasDAO._listar_empresas,
+            "meses": TarefasDAO._listar_meses,
+            "usuarios": TarefasDAO._listar_usuarios,
+        }
+        listas = {chave: _cache_get(chave) for chave in leitores}
+        faltando = [chave for chave, valor in listas.items() if valor is None]
+        if faltando:
+            with db_cursor() as cur:
+                for chave in faltando:
+                    listas[chave] = leitores[chave](cur)
+                    _cache_set(chave, 60, listas[chave])
+        return listas
 
     @staticmethod
     def inserir_tarefa(dados):
@@ -96,6 +231,9 @@ class TarefasDAO:
                 dados["p1"], dados["p2"], dados["tipo"],
                 dados["status"], dados["prioridade"], dados["mes"]
             ))
+            tarefa_id = cur.lastrowid
+        invalidar_cache("meses")
+        return tarefa_id
 
     @staticmethod
     def atualizar_tarefa(tarefa_id, dados):
@@ -111,12 +249,15 @@ class TarefasDAO:
                 dados["tipo"], dados["status"],
                 dados["prioridade"], dados["mes"], tarefa_id
             ))
+        invalidar_cache("meses")
 
     @staticmethod
     def excluir_tarefa(tarefa_id):
         with db_cursor(commit=True, dictionary=False) as cur:
             cur.execute("DELETE FROM tarefas_integracao WHERE id = %s", (tarefa_id,))
-            return cur.rowcount
+            linhas = cur.rowcount
+        invalidar_cache("meses")
+        return linhas
 
     @staticmethod
     def concluir_tarefa(empresa_id, tipo):
@@ -129,14 +270,16 @@ class TarefasDAO:
             return cur.rowcount
 
     @staticmethod
-    def adicionar_tarefa(empresa_id, prioridade, p1, p2, tipo):
-        conn = Database.get_connection()
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO tarefas_integracao (empresa_id, prioridade_tarefa, p1, p2, tipo, status, atualizado_em)
-            VALUES (%s, %s, %s, %s, %s, 'Pendente', NOW())
-        """, (empresa_id, prioridade, p1, p2, tipo))
-        conn.commit()
-        cur.close()
-        conn.close()
-
+    def concluir_tarefas_empresa(empresa_id, tipos):
+        """Conclui vários tipos da empresa num único UPDATE/commit."""
+        tipos = tuple(tipos)
+        if not tipos:
+            return 0
+        marcadores = ",".join(["%s"] * len(tipos))
+        with db_cursor(commit=True, dictionary=False) as cur:
+            cur.execute(f"""
+                UPDATE tarefas_integracao
+                SET status = 'Concluída', atualizado_em = NOW()
+                WHERE empresa_id = %s AND tipo IN ({marcadores})
+            """, (empresa_id, *tipos))
+            return cur.rowcount
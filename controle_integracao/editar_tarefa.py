@@ -1,6 +1,10 @@
 # controle_integracao/editar_tarefa.py
-from PySide6 import QtWidgets
-from PySide6.QtCore import Qt
+import bisect
+import sys
+
+from PySide6 import QtWidgets, QtCore
+from PySide6.QtCore import Qt, QThreadPool, Slot
+from PySide6.QtGui import QStandardItem, QStandardItemModel
 from . import integracao_db
 
 DIALOG_STYLE = """
@@ -33,6 +37,54 @@ QPushButton:hover {
 }
 """
 
+def _modelo_lista(itens, parent):
+    """Monta o model inteiro antes de entregar ao combo (um setModel só)."""
+    return QtCore.QStringListModel(list(itens), parent)
+
+
+def _preencher_codigos(model, pares):
+    """Preenche de novo o model de duas colunas (cód, cód athenas) dos dois combos."""
+    model.setRowCount(0)
+    model.setRowCount(len(pares))
+    for i, (cod, ath) in enumerate(pares):
+        model.setItem(i, 0, QStandardItem(cod))
+        model.setItem(i, 1, QStandardItem(ath))
+
+
+def _com_item(lista, valor, decrescente=False):
+    """Devolve ``lista`` (já ordenada) com ``valor`` na posição certa, se faltar.
+
+    Não reordena nada e não altera a lista original (ela vem do cache).
+    """
+    if not valor or valor in lista:
+        return lista
+    if decrescente:
+        pos = next((i for i, v in enumerate(lista) if v < valor), len(lista))
+    else:
+        pos = bisect.bisect_left(lista, valor)
+    return lista[:pos] + [valor] + lista[pos:]
+
+
+class _BootstrapSignals(QtCore.QObject):
+    finished = QtCore.Signal(object)
+    failed = QtCore.Signal(object)
+
+
+class _BootstrapWorker(QtCore.QRunnable):
+    def __init__(self, tarefa_id):
+        super().__init__()
+        self.tarefa_id = tarefa_id
+        self.signals = _BootstrapSignals()
+
+    def run(self):  # executado fora da thread principal
+        try:
+            boot = integracao_db.bootstrap_editar_tarefa(self.tarefa_id)
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(boot)
+
+
 class PopupEditarTarefa(QtWidgets.QDialog):
     def __init__(self, tarefa_id, usuario_logado, parent=None, on_save=None):
         super().__init__(parent)
@@ -45,60 +97,34 @@ class PopupEditarTarefa(QtWidgets.QDialog):
         self.usuario_logado = usuario_logado  # nome do cara logado p/ auditoria
         self.on_save = on_save
 
-        dados = integracao_db.get_tarefa(tarefa_id)
-        if not dados:
-            QtWidgets.QMessageBox.critical(self, "Erro", "Tarefa não encontrada.")
-            self.reject()
-            return
-
-        empresas = integracao_db.listar_empresas()
-        self.meses_existentes = sorted(set(integracao_db.listar_meses_existentes() + ([dados["mes"]] if dados["mes"] else [])))
-        self.responsaveis = integracao_db.listar_responsaveis()
-        self.tipos_existentes = sorted(set(integracao_db.listar_tipos_existentes() + ([dados["tipo"]] if dados["tipo"] else [])))
-
-        # map helpers iguais ao adicionar
+        # maps preenchidos quando o bootstrap chegar
         self.empresa_cod_map = {}
         self.map_por_cod = {}
         self.map_por_ath = {}
-
-        for e in empresas:
-            nome_emp = e["empresa"] or ""
-            cod_emp = e["cod"] or ""
-            ath_emp = e["cod_athenas"] or ""
-            self.empresa_cod_map.setdefault(nome_emp, []).append((cod_emp, ath_emp))
-            if cod_emp:
-                self.map_por_cod[cod_emp] = {"empresa": nome_emp, "cod_athenas": ath_emp}
-            if ath_emp:
-                self.map_por_ath[ath_emp] = {"empresa": nome_emp, "cod": cod_emp}
+        # model (cód | cód athenas) das empresas com vários códigos: um só,
+        # reenchido a cada troca de empresa em vez de criar outro
+        self._modelo_cods = QStandardItemModel(0, 2, self)
 
         root = QtWidgets.QGridLayout(self)
 
-        # coluna esquerda
+        # coluna esquerda (combos vazios: dados chegam do bootstrap em thread)
         col_esq = QtWidgets.QVBoxLayout()
 
         lbl_empresa = QtWidgets.QLabel("Empresa:")
         self.cb_empresa = QtWidgets.QComboBox()
         self.cb_empresa.setEditable(True)
-        self.cb_empresa.addItems(sorted(self.empresa_cod_map.keys()))
-        self.cb_empresa.setCurrentText(dados["empresa"])
 
         lbl_cod = QtWidgets.QLabel("Cód:")
         self.cb_cod = QtWidgets.QComboBox()
         self.cb_cod.setEditable(True)
-        self.cb_cod.addItems(sorted(self.map_por_cod.keys()))
-        self.cb_cod.setCurrentText(dados["cod"] or "")
 
         lbl_cod_ath = QtWidgets.QLabel("Cód Athenas:")
         self.cb_cod_ath = QtWidgets.QComboBox()
         self.cb_cod_ath.setEditable(True)
-        self.cb_cod_ath.addItems(sorted(self.map_por_ath.keys()))
-        self.cb_cod_ath.setCurrentText(dados["cod_athenas"] or "")
 
         lbl_mes = QtWidgets.QLabel("Mês (YYYY-MM):")
         self.cb_mes = QtWidgets.QComboBox()
         self.cb_mes.setEditable(True)
-        self.cb_mes.addItems(self.meses_existentes)
-        self.cb_mes.setCurrentText(dados["mes"] or "")
 
         col_esq.addWidget(lbl_empresa)
         col_esq.addWidget(self.cb_empresa)
@@ -115,30 +141,22 @@ class PopupEditarTarefa(QtWidgets.QDialog):
         lbl_p1 = QtWidgets.QLabel("P1:")
         self.cb_p1 = QtWidgets.QComboBox()
         self.cb_p1.setEditable(True)
-        self.cb_p1.addItems(self.responsaveis)
-        self.cb_p1.setCurrentText(dados["p1"] or "")
 
         lbl_p2 = QtWidgets.QLabel("P2:")
         self.cb_p2 = QtWidgets.QComboBox()
         self.cb_p2.setEditable(True)
-        self.cb_p2.addItems(self.responsaveis)
-        self.cb_p2.setCurrentText(dados["p2"] or "")
 
         lbl_tipo = QtWidgets.QLabel("Tipo / Obrigação:")
         self.cb_tipo = QtWidgets.QComboBox()
         self.cb_tipo.setEditable(True)
-        self.cb_tipo.addItems(self.tipos_existentes if self.tipos_existentes else ["LFS", "GPS", "TRI"])
-        self.cb_tipo.setCurrentText(dados["tipo"] or "")
 
         lbl_prioridade = QtWidgets.QLabel("Prioridade da Tarefa:")
         self.cb_prioridade = QtWidgets.QComboBox()
         self.cb_prioridade.addItems(["TOP 10", "Alta", "Média", "Baixa"])
-        self.cb_prioridade.setCurrentText(dados["prioridade_tarefa"] or "Média")
 
         lbl_status = QtWidgets.QLabel("Status:")
         self.cb_status = QtWidgets.QComboBox()
         self.cb_status.addItems(["Pendente", "Concluída"])
-        self.cb_status.setCurrentText(dados["status"] or "Pendente")
 
         col_dir.addWidget(lbl_p1)
         col_dir.addWidget(self.cb_p1)
@@ -158,51 +176,147 @@ class PopupEditarTarefa(QtWidgets.QDialog):
         footer = QtWidgets.QHBoxLayout()
         self.btn_cancelar = QtWidgets.QPushButton("Cancelar")
         self.btn_salvar = QtWidgets.QPushButton("💾 Salvar Alterações")
+        self.btn_salvar.setEnabled(False)  # até os dados da tarefa chegarem
         footer.addStretch()
         footer.addWidget(self.btn_cancelar)
         footer.addWidget(self.btn_salvar)
         root.addLayout(footer, 1, 0, 1, 2)
 
         # binds
-        self.cb_empresa.currentTextChanged.connect(self._empresa_changed)
+        # _updating: enquanto um handler escreve nos combos irmãos, os outros
+        # não reagem (sem efeito cascata empresa -> cod -> empresa ...);
+        # começa True para ignorar tudo até o bootstrap preencher os combos
+        self._updating = True
+        # empresa é digitada: espera 150 ms sem tecla antes de preencher os códigos
+        self._debounce = QtCore.QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(150)
+        self._debounce.timeout.connect(self._empresa_changed)
+        self.cb_empresa.editTextChanged.connect(lambda _texto: self._debounce.start())
         self.cb_cod.currentTextChanged.connect(self._cod_changed)
         self.cb_cod_ath.currentTextChanged.connect(self._ath_changed)
 
         self.btn_cancelar.clicked.connect(self.reject)
         self.btn_salvar.clicked.connect(self._salvar)
 
+        # uma ida só ao banco (bootstrap), fora da thread da interface:
+        # o diálogo aparece na hora e os combos são preenchidos na volta
+        worker = _BootstrapWorker(tarefa_id)
+        worker.signals.finished.connect(self._on_bootstrap)
+        worker.signals.failed.connect(self._on_bootstrap_erro)
+        QThreadPool.globalInstance().start(worker)
+
+    @Slot(object)
+    def _on_bootstrap(self, boot):
+        dados = boot["tarefa"]
+        if not dados:
+            QtWidgets.QMessageBox.critical(self, "Erro", "Tarefa não encontrada.")
+            self.reject()
+            return
+
+        # as listas já vêm DISTINCT e ordenadas do banco (meses DESC, tipos ASC):
+        # só encaixa o mês/tipo da tarefa no lugar certo, se não estiver lá
+        self.meses_existentes = _com_item(boot["meses"], dados["mes"], decrescente=True)
+        self.responsaveis = boot["responsaveis"]
+        self.tipos_existentes = _com_item(boot["tipos"], dados["tipo"])
+
+        # maps e listas ordenadas já prontos no cache do integracao_db
+        indices = integracao_db.indices_empresas(boot["empresas"])
+        self.empresa_cod_map = indices.empresa_cod_map
+        self.map_por_cod = indices.map_por_cod
+        self.map_por_ath = indices.map_por_ath
+
+        self.cb_empresa.setModel(_modelo_lista(self.empresa_cod_map.keys(), self.cb_empresa))
+        self.cb_empresa.setCurrentText(dados["empresa"])
+        self.cb_cod.setModel(_modelo_lista(indices.cods, self.cb_cod))
+        self.cb_cod.setCurrentText(dados["cod"] or "")
+        self.cb_cod_ath.setModel(_modelo_lista(indices.aths, self.cb_cod_ath))
+        self.cb_cod_ath.setCurrentText(dados["cod_athenas"] or "")
+        self.cb_mes.setModel(_modelo_lista(self.meses_existentes, self.cb_mes))
+        self.cb_mes.setCurrentText(dados["mes"] or "")
+
+        self.cb_p1.addItems(self.responsaveis)
+        self.cb_p1.setCurrentText(dados["p1"] or "")
+        self.cb_p2.addItems(self.responsaveis)
+        self.cb_p2.setCurrentText(dados["p2"] or "")
+        self.cb_tipo.addItems(self.tipos_existentes if self.tipos_existentes else ["LFS", "GPS", "TRI"])
+        self.cb_tipo.setCurrentText(dados["tipo"] or "")
+        self.cb_prioridade.setCurrentText(dados["prioridade_tarefa"] or "Média")
+        self.cb_status.setCurrentText(dados["status"] or "Pendente")
+
+        # preenchimento inicial não conta como edição do usuário
+        self._debounce.stop()
+        self._updating = False
+        self.btn_salvar.setEnabled(True)
+
+    @Slot(object)
+    def _on_bootstrap_erro(self, exc):
+        QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao carregar a tarefa:\n{exc}")
+        self.reject()
+
     def _empresa_changed(self):
-        emp = self.cb_empresa.currentText().strip()
+        if self._updating:
+            return
+        emp = sys.intern(self.cb_empresa.currentText().strip())
         lista = self.empresa_cod_map.get(emp)
         if not lista:
             return
         if len(lista) == 1:
             cod, ath = lista[0]
-            self.cb_cod.setCurrentText(cod)
-            self.cb_cod_ath.setCurrentText(ath)
+            self._updating = True
+            try:
+                self.cb_cod.setCurrentText(cod)
+                self.cb_cod_ath.setCurrentText(ath)
+            finally:
+                self._updating = False
         else:
-            cods = [c for c, _ in lista]
-            athenas_list = [a for _, a in lista]
-            self.cb_cod.clear()
-            self.cb_cod.addItems(cods)
-            self.cb_cod.setCurrentText(cods[0] if cods else "")
-            self.cb_cod_ath.clear()
-            self.cb_cod_ath.addItems(athenas_list)
-            self.cb_cod_ath.setCurrentText(athenas_list[0] if athenas_list else "")
+            # um model só (cód | cód athenas) para os dois combos, cada um
+            # exibindo sua coluna; sem sinais para não disparar
+            # _cod_changed/_ath_changed na troca
+            model = self._modelo_cods
+            self.cb_cod.blockSignals(True)
+            self.cb_cod_ath.blockSignals(True)
+            try:
+                _preencher_codigos(model, lista)
+                if self.cb_cod.model() is not model:
+                    self.cb_cod.setModel(model)
+                    self.cb_cod.setModelColumn(0)
+                    self.cb_cod_ath.setModel(model)
+                    self.cb_cod_ath.setModelColumn(1)
+                self.cb_cod.setCurrentText(lista[0][0])
+                self.cb_cod_ath.setCurrentText(lista[0][1])
+            finally:
+                self.cb_cod.blockSignals(False)
+                self.cb_cod_ath.blockSignals(False)
 
     def _cod_changed(self):
+        if self._updating:
+            return
         c = self.cb_cod.currentText().strip()
-        info = self.map_por_cod.get(c)
+        info = self.map_por_cod.get(sys.intern(c))
         if info:
-            self.cb_empresa.setCurrentText(info["empresa"])
-            self.cb_cod_ath.setCurrentText(info["cod_athenas"])
+            self._updating = True
+            try:
+                self.cb_empresa.setCurrentText(info.empresa)
+                self.cb_cod_ath.setCurrentText(info.ath)
+            finally:
+                self._updating = False
+            # o texto da empresa mudou por código: não precisa rodar o debounce
+            self._debounce.stop()
 
     def _ath_changed(self):
+        if self._updating:
+            return
         a = self.cb_cod_ath.currentText().strip()
-        info = self.map_por_ath.get(a)
+        info = self.map_por_ath.get(sys.intern(a))
         if info:
-            self.cb_empresa.setCurrentText(info["empresa"])
-            self.cb_cod.setCurrentText(info["cod"])
+            self._updating = True
+            try:
+                self.cb_empresa.setCurrentText(info.empresa)
+                self.cb_cod.setCurrentText(info.cod)
+            finally:
+                self._updating = False
+            self._debounce.stop()
 
     def _salvar(self):
         empresa_nome = self.cb_empresa.currentText().strip()
@@ -222,7 +336,7 @@ class PopupEditarTarefa(QtWidgets.QDialog):
         prioridade_empresa = "Média"
         top10_flag = 1 if prioridade_tarefa == "TOP 10" else 0
 
-        empresa_id = integracao_db.garantir_empresa(
+        empresa_id, _ = integracao_db.garantir_empresa(
             empresa_nome=empresa_nome,
             cod=cod,
             cod_athenas=cod_ath,
@@ -1,16 +1,9 @@
 # controle_integracao/exportar_excel.py
-import pandas as pd
+import xlsxwriter
 from PySide6 import QtWidgets
 from . import integracao_db
 
 def exportar_excel(parent=None, filtro_mes=None):
-    dados = integracao_db.export_raw(filtro_mes=filtro_mes)
-    if not dados:
-        QtWidgets.QMessageBox.information(parent, "Exportar", "Não há dados para exportar.")
-        return
-
-    df = pd.DataFrame(dados)
-
     caminho, _ = QtWidgets.QFileDialog.getSaveFileName(
         parent,
         "Salvar Relatório Excel",
@@ -20,8 +13,28 @@ def exportar_excel(parent=None, filtro_mes=None):
     if not caminho:
         return
 
+    # linhas vêm em streaming do banco direto para o xlsxwriter
+    # (tuplas, sem dict nem DataFrame no meio); a primeira é o cabeçalho
+    linhas = integracao_db.export_raw_iter(filtro_mes=filtro_mes)
     try:
-        df.to_excel(caminho, index=False)
+        cabecalho = next(linhas)
+        primeira = next(linhas, None)
+        if primeira is None:
+            QtWidgets.QMessageBox.information(parent, "Exportar", "Não há dados para exportar.")
+            return
+
+        # o "with" fecha o arquivo mesmo se a leitura do banco falhar no meio
+        with xlsxwriter.Workbook(caminho, {
+            "constant_memory": True,
+            "default_date_format": "dd/mm/yyyy hh:mm",
+        }) as wb:
+            ws = wb.add_worksheet()
+            ws.write_row(0, 0, cabecalho)
+            ws.write_row(1, 0, primeira)
+            for i, row in enumerate(linhas, start=2):
+                ws.write_row(i, 0, row)
         QtWidgets.QMessageBox.information(parent, "Exportar", "Relatório exportado com sucesso!")
     except Exception as e:
         QtWidgets.QMessageBox.critical(parent, "Erro", f"Erro ao salvar Excel:\n{e}")
+    finally:
+        linhas.close()
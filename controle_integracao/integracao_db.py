@@ -1,88 +1,288 @@
 # controle_integracao/integracao_db.py
+from collections import namedtuple
 from database import conectar
+import sys
+import threading
+import time
 import uuid
 
-DB_NAME = "sistema_login"
 
+_DML = ("INSERT", "UPDATE", "DELETE", "REPLACE")
 
-def _exec(query, params=None, fetch="none", many=False):
+
+def _exec(query, params=None, fetch="none", many=False, commit=None):
     """
     Executa query no banco.
     fetch:
       - "none": só executa
       - "one": retorna uma linha (dict ou None)
       - "all": retorna lista de linhas (list[dict])
+    commit:
+      - None: faz commit só se a query for INSERT/UPDATE/DELETE/REPLACE
+      - True/False: força
     """
-    conn = conectar()
-    cur = conn.cursor(dictionary=True)
+    if commit is None:
+        commit = query.lstrip().upper().startswith(_DML)
+
+    # o pool já abre a conexão no banco certo (database=... nas configs),
+    # então não precisa de USE; o "with" devolve a conexão ao pool
+    with conectar() as conn:
+        cur = conn.cursor(dictionary=True)
+        try:
+            if many:
+                cur.executemany(query, params or [])
+            else:
+                cur.execute(query, params or [])
+
+            data = None
+            if fetch == "one":
+                data = cur.fetchone()
+            elif fetch == "all":
+                data = cur.fetchall()
+
+            if commit:
+                conn.commit()
+        except Exception:
+            if commit:
+                conn.rollback()
+            raise
+        finally:
+            cur.close()
+    return data
 
-    # garante que estamos no banco certo
-    cur.execute(f"USE {DB_NAME};")
 
-    if many:
-        cur.executemany(query, params or [])
-    else:
-        cur.execute(query, params or [])
+def _exec_tx(comandos):
+    """
+    Executa vários (query, params) na mesma conexão e num commit só.
+    Se um falhar, nenhum é gravado.
+    """
+    with conectar() as conn:
+        cur = conn.cursor()
+        try:
+            for query, params in comandos:
+                cur.execute(query, params or [])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
 
-    data = None
-    if fetch == "one":
-        data = cur.fetchone()
-    elif fetch == "all":
-        data = cur.fetchall()
+# =========================
+# CACHE (listas de apoio dos popups)
+# =========================
+_CACHE_TTL = 30
+_CACHE = {}
+_CACHE_TS = {}
+_CACHE_LOCK = threading.Lock()
 
-    conn.commit()
-    cur.close()
-    conn.close()
-    return data
+
+def _cache_get(key):
+    with _CACHE_LOCK:
+        if key in _CACHE and time.monotonic() - _CACHE_TS.get(key, 0) < _CACHE_TTL:
+            return _CACHE[key]
+    return None
+
+
+def _cache_set(key, valor):
+    with _CACHE_LOCK:
+        _CACHE[key] = valor
+        _CACHE_TS[key] = time.monotonic()
+    return valor
+
+
+# entradas derivadas de outra: caem junto com ela
+_CACHE_DEPENDENTES = {"empresas": ("empresas_indices",)}
+
+
+def invalidar_cache(*keys):
+    """Sem argumentos limpa tudo."""
+    keys = [d for k in keys for d in (k, *_CACHE_DEPENDENTES.get(k, ()))]
+    with _CACHE_LOCK:
+        for key in keys or list(_CACHE):
+            _CACHE.pop(key, None)
+            _CACHE_TS.pop(key, None)
+
+
+def _cached(key, carregar):
+    valor = _cache_get(key)
+    if valor is None:
+        valor = _cache_set(key, carregar())
+    return valor
 
 
 # =========================
 # EMPRESAS
 # =========================
 
+_SQL_EMPRESAS = """
+    SELECT id, empresa, cod, cod_athenas, top10, prioridade_empresa
+    FROM empresas_integracao
+    ORDER BY empresa ASC;
+"""
+
+
 def listar_empresas():
     """Retorna todas as empresas para preencher combos e painel."""
-    return _exec("""
-        SELECT id, empresa, cod, cod_athenas, top10, prioridade_empresa
-        FROM empresas_integracao
-        ORDER BY empresa ASC;
-    """, fetch="all")
+    return _cached("empresas", lambda: _exec(_SQL_EMPRESAS, fetch="all"))
+
+
+# uma linha por empresa; strings internadas -> lookups nos maps por ponteiro
+EmpRow = namedtuple("EmpRow", "empresa cod ath")
+EmpresasIndices = namedtuple("EmpresasIndices", "empresa_cod_map map_por_cod map_por_ath cods aths")
+
+
+def indices_empresas(empresas=None):
+    """
+    Maps e listas ordenadas que os combos de empresa/cód/cód athenas usam,
+    montados uma vez e guardados no cache junto com as empresas (os popups
+    só leem, não ordenam nada). ``empresas`` evita nova consulta quando o
+    chamador já tem a lista.
+    """
+    def montar():
+        rows = [
+            EmpRow(sys.intern(e["empresa"] or ""), sys.intern(e["cod"] or ""), sys.intern(e["cod_athenas"] or ""))
+            for e in (empresas if empresas is not None else listar_empresas())
+        ]
+        # empresas vêm em ORDER BY empresa: a ordem do dict já é a dos combos
+        empresa_cod_map = {}
+        for r in rows:
+            empresa_cod_map.setdefault(r.empresa, []).append((r.cod, r.ath))
+        map_por_cod = {r.cod: r for r in rows if r.cod}
+        map_por_ath = {r.ath: r for r in rows if r.ath}
+        return EmpresasIndices(empresa_cod_map, map_por_cod, map_por_ath,
+                               sorted(map_por_cod), sorted(map_por_ath))
+
+    return _cached("empresas_indices", montar)
+
+
+_SQL_EMPRESA_POR_NOME_COD = """
+    SELECT id, empresa, cod, cod_athenas, top10, prioridade_empresa
+    FROM empresas_integracao
+    WHERE empresa = %s AND cod = %s
+    LIMIT 1;
+"""
 
 
 def get_empresa_por_nome_cod(empresa_nome, cod):
-    return _exec("""
-        SELECT id, empresa, cod, cod_athenas, top10, prioridade_empresa
-        FROM empresas_integracao
-        WHERE empresa = %s AND cod = %s
-        LIMIT 1;
-    """, (empresa_nome, cod), fetch="one")
+    return _exec(_SQL_EMPRESA_POR_NOME_COD, (empresa_nome, cod), fetch="one")
+
+
+# A chave única (empresa, cod) está em docs/conexao_tabelas.md, mas bancos
+# antigos podem não ter rodado o ALTER. Sem ela o ON DUPLICATE KEY nunca
+# dispara e cada gravação criaria uma empresa duplicada, então o upsert
+# atômico só é usado quando o catálogo confirma a chave.
+_SQL_TEM_UQ_EMPRESA = """
+    SELECT index_name
+    FROM information_schema.STATISTICS
+    WHERE table_schema = DATABASE()
+      AND table_name = 'empresas_integracao'
+      AND non_unique = 0
+    GROUP BY index_name
+    HAVING COUNT(*) = 2 AND SUM(column_name IN ('empresa', 'cod')) = 2
+    LIMIT 1;
+"""
+
+_SQL_UPSERT_EMPRESA = """
+    INSERT INTO empresas_integracao
+    (id, empresa, cod, cod_athenas, top10, prioridade_empresa, criado_em)
+    VALUES (%s, %s, %s, %s, %s, %s, NOW())
+    ON DUPLICATE KEY UPDATE
+        cod_athenas = VALUES(cod_athenas),
+        prioridade_empresa = VALUES(prioridade_empresa),
+        top10 = VALUES(top10)
+"""
+
+_SQL_INSERIR_EMPRESA = """
+    INSERT INTO empresas_integracao
+    (id, empresa, cod, cod_athenas, top10, prioridade_empresa, criado_em)
+    VALUES (%s, %s, %s, %s, %s, %s, NOW())
+"""
+
+_SQL_ATUALIZAR_EMPRESA = """
+    UPDATE empresas_integracao
+    SET cod_athenas = %s,
+        prioridade_empresa = %s,
+        top10 = %s
+    WHERE id = %s
+"""
+
+
+def _tem_chave_unica_empresa():
+    # False também vai pro cache (só None conta como ausente): o catálogo é
+    # consultado de novo a cada _CACHE_TTL, e o ALTER passa a valer sozinho
+    return _cached("uq_empresa", lambda: _exec(_SQL_TEM_UQ_EMPRESA, fetch="one") is not None)
+
+
+def _garantir_empresa_cur(cur, empresa_nome, cod, cod_athenas, prioridade_empresa, top10_flag, upsert):
+    """
+    Corpo do garantir_empresa sobre um cursor (tupla) já aberto, sem commit:
+    serve para o garantir_empresa e para transações maiores
+    (salvar_tarefa_completa). Retorna (empresa_id, alterada).
+    """
+    if upsert:
+        # rowcount do MySQL: 1 = inseriu, 2 = atualizou, 0 = já estava igual
+        novo_id = str(uuid.uuid4())
+        cur.execute(_SQL_UPSERT_EMPRESA,
+                    (novo_id, empresa_nome, cod, cod_athenas, top10_flag, prioridade_empresa))
+        afetadas = cur.rowcount
+        if afetadas == 1:
+            return novo_id, True
+        # id é UUID (não AUTO_INCREMENT): LAST_INSERT_ID não serve,
+        # então busca o id da linha existente na mesma conexão
+        cur.execute(_SQL_EMPRESA_POR_NOME_COD, (empresa_nome, cod))
+        return cur.fetchone()[0], afetadas > 0
+
+    # sem a chave única: SELECT e depois UPDATE/INSERT
+    cur.execute(_SQL_EMPRESA_POR_NOME_COD, (empresa_nome, cod))
+    existente = cur.fetchone()
+    if existente is None:
+        empresa_id = str(uuid.uuid4())
+        cur.execute(_SQL_INSERIR_EMPRESA,
+                    (empresa_id, empresa_nome, cod, cod_athenas, top10_flag, prioridade_empresa))
+        return empresa_id, True
+
+    # colunas de _SQL_EMPRESA_POR_NOME_COD:
+    # id, empresa, cod, cod_athenas, top10, prioridade_empresa
+    empresa_id, _, _, ath_atual, top10_atual, prioridade_atual = existente
+    alterada = not (
+        (ath_atual or "") == (cod_athenas or "")
+        and prioridade_atual == prioridade_empresa
+        and int(top10_atual or 0) == int(top10_flag)
+    )
+    if alterada:
+        cur.execute(_SQL_ATUALIZAR_EMPRESA, (cod_athenas, prioridade_empresa, top10_flag, empresa_id))
+    return empresa_id, alterada
 
 
 def garantir_empresa(empresa_nome, cod, cod_athenas, prioridade_empresa, top10_flag):
     """
     Se a empresa já existir (mesmo nome+cod) -> atualiza infos essenciais.
     Senão -> cria uma nova.
-    Retorna empresa_id final.
-    """
-    existente = get_empresa_por_nome_cod(empresa_nome, cod)
-    if existente:
-        empresa_id = existente["id"]
-        _exec("""
-            UPDATE empresas_integracao
-            SET cod_athenas = %s,
-                prioridade_empresa = %s,
-                top10 = %s
-            WHERE id = %s
-        """, (cod_athenas, prioridade_empresa, top10_flag, empresa_id))
-        return empresa_id
-    else:
-        empresa_id = str(uuid.uuid4())
-        _exec("""
-            INSERT INTO empresas_integracao
-            (id, empresa, cod, cod_athenas, top10, prioridade_empresa, criado_em)
-            VALUES (%s, %s, %s, %s, %s, %s, NOW())
-        """, (empresa_id, empresa_nome, cod, cod_athenas, top10_flag, prioridade_empresa))
-        return empresa_id
+    Retorna (empresa_id, alterada), onde alterada indica se algo foi
+    gravado (empresa nova ou dados diferentes) -> útil p/ invalidar caches.
+
+    Com o UNIQUE KEY (empresa, cod) no banco é um INSERT ... ON DUPLICATE
+    KEY UPDATE só (atômico); sem ele, SELECT + UPDATE/INSERT.
+    """
+    upsert = _tem_chave_unica_empresa()
+    with conectar() as conn:
+        cur = conn.cursor()
+        try:
+            empresa_id, alterada = _garantir_empresa_cur(
+                cur, empresa_nome, cod, cod_athenas, prioridade_empresa, top10_flag, upsert
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    if alterada:
+        invalidar_cache("empresas")
+    return empresa_id, alterada
 
 
 # =========================
@@ -92,6 +292,7 @@ def garantir_empresa(empresa_nome, cod, cod_athenas, prioridade_empresa, top10_f
 def listar_tarefas(f_empresa=None, f_mes=None, f_status=None, f_tipo=None):
     """
     Carrega as tarefas com dados da empresa.
+    f_empresa filtra por trecho do nome da empresa (em qualquer posição).
     """
     sql = """
         SELECT
@@ -115,8 +316,12 @@ def listar_tarefas(f_empresa=None, f_mes=None, f_status=None, f_tipo=None):
     params = []
 
     if f_empresa:
+        # busca por trecho ("contém"), como sempre foi: quem procura uma
+        # palavra do meio do nome continua achando. % e _ digitados viram
+        # literais em vez de curingas
         sql += " AND e.empresa LIKE %s"
-        params.append(f"%{f_empresa}%")
+        trecho = f_empresa.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params.append(f"%{trecho}%")
     if f_mes:
         sql += " AND t.mes = %s"
         params.append(f_mes)
@@ -132,93 +337,173 @@ def listar_tarefas(f_empresa=None, f_mes=None, f_status=None, f_tipo=None):
     return _exec(sql, tuple(params), fetch="all")
 
 
+_SQL_INSERIR_TAREFA = """
+    INSERT INTO tarefas_integracao
+    (empresa_id, p1, p2, tipo, status, prioridade_tarefa, mes, atualizado_em)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
+"""
+
+
 def inserir_tarefa(empresa_id, mes, tipo, p1, p2, prioridade_tarefa, status):
-    _exec("""
-        INSERT INTO tarefas_integracao
-        (empresa_id, p1, p2, tipo, status, prioridade_tarefa, mes, atualizado_em)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
-    """, (empresa_id, p1, p2, tipo, status, prioridade_tarefa, mes))
+    _exec(_SQL_INSERIR_TAREFA, (empresa_id, p1, p2, tipo, status, prioridade_tarefa, mes))
+    invalidar_cache("meses", "tipos")
+
+
+def salvar_tarefa_completa(empresa_nome, cod, cod_athenas, prioridade_empresa, top10_flag,
+                           mes, tipo, p1, p2, prioridade_tarefa, status):
+    """
+    garantir_empresa + inserir_tarefa numa transação só (mesma conexão,
+    um commit). Se qualquer passo falhar nada é gravado.
+    Retorna (empresa_id, empresa_alterada) igual ao garantir_empresa.
+    """
+    upsert = _tem_chave_unica_empresa()
+    with conectar() as conn:
+        cur = conn.cursor()
+        try:
+            empresa_id, empresa_alterada = _garantir_empresa_cur(
+                cur, empresa_nome, cod, cod_athenas, prioridade_empresa, top10_flag, upsert
+            )
+
+            cur.execute(_SQL_INSERIR_TAREFA, (empresa_id, p1, p2, tipo, status, prioridade_tarefa, mes))
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    invalidar_cache("meses", "tipos", *(("empresas",) if empresa_alterada else ()))
+    return empresa_id, empresa_alterada
+
+
+_SQL_GET_TAREFA = """
+    SELECT
+        t.id              AS tarefa_id,
+        t.empresa_id      AS empresa_id,
+        e.empresa         AS empresa,
+        e.cod             AS cod,
+        e.cod_athenas     AS cod_athenas,
+        e.top10           AS top10,
+        e.prioridade_empresa AS prioridade_empresa,
+        t.mes             AS mes,
+        t.tipo            AS tipo,
+        t.p1              AS p1,
+        t.p2              AS p2,
+        t.prioridade_tarefa AS prioridade_tarefa,
+        t.status          AS status
+    FROM tarefas_integracao t
+    JOIN empresas_integracao e ON e.id = t.empresa_id
+    WHERE t.id = %s
+    LIMIT 1;
+"""
 
 
 def get_tarefa(tarefa_id):
-    return _exec("""
-        SELECT
-            t.id              AS tarefa_id,
-            t.empresa_id      AS empresa_id,
-            e.empresa         AS empresa,
-            e.cod             AS cod,
-            e.cod_athenas     AS cod_athenas,
-            e.top10           AS top10,
-            e.prioridade_empresa AS prioridade_empresa,
-            t.mes             AS mes,
-            t.tipo            AS tipo,
-            t.p1              AS p1,
-            t.p2              AS p2,
-            t.prioridade_tarefa AS prioridade_tarefa,
-            t.status          AS status
-        FROM tarefas_integracao t
-        JOIN empresas_integracao e ON e.id = t.empresa_id
-        WHERE t.id = %s
-        LIMIT 1;
-    """, (tarefa_id,), fetch="one")
+    return _exec(_SQL_GET_TAREFA, (tarefa_id,), fetch="one")
 
 
 def atualizar_tarefa(tarefa_id, empresa_id, mes, tipo, p1, p2, prioridade_tarefa, status, usuario_responsavel=None):
-    _exec("""
-        UPDATE tarefas_integracao
-        SET empresa_id = %s,
-            mes = %s,
-            tipo = %s,
-            p1 = %s,
-            p2 = %s,
-            prioridade_tarefa = %s,
-            status = %s,
-            atualizado_em = NOW()
-        WHERE id = %s
-    """, (empresa_id, mes, tipo, p1, p2, prioridade_tarefa, status, tarefa_id))
-
-    # log de auditoria (opcional, não quebra se falhar)
-    _exec("""
-        INSERT INTO tarefas_integracao_log (tarefa_id, empresa_id, acao, usuario_responsavel, timestamp)
-        VALUES (%s, %s, %s, %s, NOW())
-    """, (
-        tarefa_id,
-        empresa_id,
-        f"Edição de tarefa: status={status}, prioridade={prioridade_tarefa}",
-        usuario_responsavel or ""
-    ))
+    # UPDATE + log de auditoria na mesma transação: ou grava os dois, ou nenhum
+    _exec_tx([
+        ("""
+            UPDATE tarefas_integracao
+            SET empresa_id = %s,
+                mes = %s,
+                tipo = %s,
+                p1 = %s,
+                p2 = %s,
+                prioridade_tarefa = %s,
+                status = %s,
+                atualizado_em = NOW()
+            WHERE id = %s
+        """, (empresa_id, mes, tipo, p1, p2, prioridade_tarefa, status, tarefa_id)),
+        ("""
+            INSERT INTO tarefas_integracao_log (tarefa_id, empresa_id, acao, usuario_responsavel, timestamp)
+            VALUES (%s, %s, %s, %s, NOW())
+        """, (
+            tarefa_id,
+            empresa_id,
+            f"Edição de tarefa: status={status}, prioridade={prioridade_tarefa}",
+            usuario_responsavel or ""
+        )),
+    ])
+    invalidar_cache("meses", "tipos")
+
+
+_SQL_MESES = """
+    SELECT DISTINCT mes
+    FROM tarefas_integracao
+    WHERE mes <> ''
+    ORDER BY mes DESC;
+"""
+
+_SQL_TIPOS = """
+    SELECT DISTINCT tipo
+    FROM tarefas_integracao
+    ORDER BY tipo ASC;
+"""
+
+# pega da tabela usuarios (que você já tem no login)
+_SQL_RESPONSAVEIS = """
+    SELECT nome
+    FROM usuarios
+    ORDER BY nome ASC;
+"""
 
 
 def listar_meses_existentes():
-    rows = _exec("""
-        SELECT DISTINCT mes
-        FROM tarefas_integracao
-        WHERE mes <> ''
-        ORDER BY mes DESC;
-    """, fetch="all")
-    return [r["mes"] for r in rows]
+    return _cached("meses", lambda: [r["mes"] for r in _exec(_SQL_MESES, fetch="all")])
 
 
 def listar_tipos_existentes():
-    rows = _exec("""
-        SELECT DISTINCT tipo
-        FROM tarefas_integracao
-        ORDER BY tipo ASC;
-    """, fetch="all")
-    return [r["tipo"] for r in rows]
+    return _cached("tipos", lambda: [r["tipo"] for r in _exec(_SQL_TIPOS, fetch="all")])
 
 
 def listar_responsaveis():
-    # pega da tabela usuarios (que você já tem no login)
-    rows = _exec("""
-        SELECT nome
-        FROM usuarios
-        ORDER BY nome ASC;
-    """, fetch="all")
-    return [r["nome"] for r in rows]
+    return _cached("responsaveis", lambda: [r["nome"] for r in _exec(_SQL_RESPONSAVEIS, fetch="all")])
 
 
-def export_raw(filtro_mes=None):
+def bootstrap_editar_tarefa(tarefa_id):
+    """
+    Tudo que o PopupEditarTarefa precisa com uma conexão só do pool:
+    as cinco SELECTs rodam em sequência no mesmo cursor (sem multi=True,
+    que o mysql-connector descontinuou).
+    Retorna dict com empresas, meses, responsaveis, tipos e tarefa (ou None).
+    Com as listas de apoio ainda no cache, só a tarefa é consultada.
+    """
+    listas = {key: _cache_get(key) for key in ("empresas", "meses", "responsaveis", "tipos")}
+    if all(v is not None for v in listas.values()):
+        return dict(listas, tarefa=get_tarefa(tarefa_id))
+
+    consultas = (
+        (_SQL_EMPRESAS, ()),
+        (_SQL_MESES, ()),
+        (_SQL_RESPONSAVEIS, ()),
+        (_SQL_TIPOS, ()),
+        (_SQL_GET_TAREFA, (tarefa_id,)),
+    )
+    with conectar() as conn:
+        cur = conn.cursor(dictionary=True)
+        try:
+            resultados = []
+            for sql, params in consultas:
+                cur.execute(sql, params)
+                resultados.append(cur.fetchall())
+        finally:
+            cur.close()
+
+    empresas, meses, responsaveis, tipos, tarefa = resultados
+    return {
+        "empresas": _cache_set("empresas", empresas),
+        "meses": _cache_set("meses", [r["mes"] for r in meses]),
+        "responsaveis": _cache_set("responsaveis", [r["nome"] for r in responsaveis]),
+        "tipos": _cache_set("tipos", [r["tipo"] for r in tipos]),
+        "tarefa": tarefa[0] if tarefa else None,
+    }
+
+
+def _sql_export_raw(filtro_mes=None):
     sql = """
         SELECT
             e.empresa,
@@ -241,5 +526,26 @@ def export_raw(filtro_mes=None):
         params.append(filtro_mes)
 
     sql += " ORDER BY e.empresa ASC, t.mes DESC, t.tipo ASC;"
+    return sql, tuple(params)
 
-    return _exec(sql, tuple(params), fetch="all")
+
+def export_raw_iter(filtro_mes=None):
+    """
+    Linhas da exportação, geradas uma a uma (cursor sem buffer): nada de
+    lista com tudo na memória. A conexão fica presa até o fim da
+    iteração.
+    O primeiro item é a tupla com os nomes das colunas; depois vêm as
+    linhas, como tuplas na mesma ordem.
+    """
+    sql, params = _sql_export_raw(filtro_mes)
+    with conectar() as conn:
+        cur = conn.cursor(buffered=False)
+        try:
+            cur.execute(sql, params)
+            yield tuple(cur.column_names)
+            for row in cur:
+                yield row
+        finally:
+            # se o gerador for abandonado no meio, descarta o que sobrou
+            conn.consume_results()
+            cur.close()
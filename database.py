@@ -3,13 +3,17 @@
 from __future__ import annotations
 
 import contextlib
+import functools
 import logging
 import os
+import re
+import threading
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, Iterable, Mapping, MutableMapping, Optional
 
-from mysql.connector import Error, pooling
+import mysql.connector
+from mysql.connector import HAVE_CEXT, Error, pooling
 
 LOGGER = logging.getLogger(__name__)
 
@@ -28,22 +32,32 @@ _ENV_FILE_CANDIDATES: Iterable[Path] = (
 )
 
 
-def _load_env_from_files(paths: Iterable[Path]) -> Dict[str, str]:
-    """Carrega pares ``chave=valor`` de possíveis arquivos ``.env``."""
+# uma linha ``CHAVE=valor`` por match; comentários (#) e linhas sem ``=``
+# simplesmente não casam. Espaços em volta da chave e do valor ficam de fora.
+_ENV_LINE_RE = re.compile(rb"(?m)^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)\s*$")
+
+
+@functools.lru_cache(maxsize=None)
+def _load_env_from_files(paths: tuple[Path, ...]) -> Mapping[str, str]:
+    """Carrega pares ``chave=valor`` de possíveis arquivos ``.env``.
+
+    O resultado fica em cache: cada conjunto de arquivos é lido uma vez por
+    processo, mesmo que ``DatabaseSettings.load`` seja chamado de novo.
+    """
 
     env: Dict[str, str] = {}
     for path in paths:
-        if not path.exists():
-            continue
         try:
-            for raw_line in path.read_text(encoding="utf-8").splitlines():
-                line = raw_line.strip()
-                if not line or line.startswith("#") or "=" not in line:
-                    continue
-                key, value = line.split("=", 1)
-                env.setdefault(key.strip(), value.strip())
+            if path.stat().st_size == 0:
+                continue
+            data = path.read_bytes()
+        except FileNotFoundError:
+            continue
         except OSError as exc:  # pragma: no cover - ambiente externo
             LOGGER.debug("Não foi possível ler %s: %s", path, exc)
+            continue
+        for match in _ENV_LINE_RE.finditer(data):
+            env.setdefault(match.group(1).decode(), match.group(2).decode("utf-8"))
     return env
 
 
@@ -109,6 +123,9 @@ class DatabaseSettings:
             "database": self.database,
             "port": self.port,
             "charset": self.charset,
+            # extensão C quando instalada (parse das linhas bem mais rápido);
+            # sem ela o conector cai no protocolo em Python puro
+            "use_pure": not HAVE_CEXT,
         }
 
 
@@ -120,10 +137,20 @@ def _safe_int(value: Optional[str], *, fallback: int, name: str) -> int:
         return fallback
 
 
+class _DirectConnector:
+    """Abre conexões avulsas, fora do pool, com a mesma interface do pool."""
+
+    def __init__(self, kwargs: Mapping[str, object]):
+        self._kwargs = dict(kwargs)
+
+    def get_connection(self):
+        return mysql.connector.connect(**self._kwargs)
+
+
 class ConnectionHandle(contextlib.AbstractContextManager):
     """Wrapper que garante fechamento adequado das conexões do pool."""
 
-    def __init__(self, pool: Optional[pooling.MySQLConnectionPool]):
+    def __init__(self, pool: Optional[pooling.MySQLConnectionPool | _DirectConnector]):
         self._pool = pool
         self._conn = None
 
@@ -137,8 +164,20 @@ class ConnectionHandle(contextlib.AbstractContextManager):
     def __exit__(self, exc_type, exc, tb):
         if self._conn is not None:
             try:
-                if self._conn.is_connected():  # type: ignore[attr-defined]
-                    self._conn.close()
+                # o pool não reseta a sessão: transação aberta (até de um
+                # SELECT, sem autocommit) não pode voltar pro pool, senão
+                # o próximo uso enxerga o snapshot antigo
+                if self._conn.in_transaction:  # type: ignore[attr-defined]
+                    self._conn.rollback()  # type: ignore[attr-defined]
+            except Error as err:  # pragma: no cover - depende do servidor MySQL
+                LOGGER.debug("Rollback ao devolver conexão falhou: %s", err)
+            # sem is_connected() antes: seria um ping (ida e volta) a cada
+            # saída do "with". O pool já reconecta na próxima retirada se o
+            # socket tiver caído.
+            try:
+                self._conn.close()
+            except Error as err:  # pragma: no cover - depende do servidor MySQL
+                LOGGER.debug("Falha ao fechar/devolver conexão: %s", err)
             finally:
                 self._conn = None
         return False
@@ -146,20 +185,32 @@ class ConnectionHandle(contextlib.AbstractContextManager):
 
 @dataclass
 class Database:
-    """Gerencia o pool de conexões reutilizado pela aplicação."""
+    """Gerencia o pool de conexões reutilizado pela aplicação.
+
+    O pool só é criado na primeira conexão pedida, e não no import: quem
+    importa ``database`` (a tela de login, por exemplo) não espera o
+    handshake das conexões antes de abrir a janela.
+    """
 
     settings: DatabaseSettings
     _pool: Optional[pooling.MySQLConnectionPool] = field(init=False, default=None)
+    _pool_lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
 
-    def __post_init__(self) -> None:
-        self._initialise_pool()
+    def _get_pool(self) -> Optional[pooling.MySQLConnectionPool]:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._initialise_pool()
+        return self._pool
 
     def _initialise_pool(self) -> None:
         try:
             self._pool = pooling.MySQLConnectionPool(
                 pool_name=self.settings.pool_name,
                 pool_size=self.settings.pool_size,
-                pool_reset_session=True,
+                # sem COM_RESET_CONNECTION a cada devolução; o rollback de
+                # transação pendente fica no ConnectionHandle.__exit__
+                pool_reset_session=False,
                 **self.settings.as_mysql_kwargs(),
             )
         except Error:
@@ -173,7 +224,7 @@ class Database:
             )
 
     def connection(self) -> ConnectionHandle:
-        return ConnectionHandle(self._pool)
+        return ConnectionHandle(self._get_pool())
 
     def ping(self) -> bool:
         try:
@@ -195,4 +246,16 @@ def conectar() -> ConnectionHandle:
     return DATABASE.connection()
 
 
-__all__ = ["SETTINGS", "DATABASE", "Database", "DatabaseSettings", "conectar"]
+def conectar_direto(**extra: object) -> ConnectionHandle:
+    """Conexão avulsa, sem pool, para os scripts de importação/manutenção.
+
+    Scripts de uma thread só não ganham nada com o pool: pagariam a criação
+    das conexões e o reset de sessão a cada devolução. ``extra`` é repassado
+    ao ``mysql.connector.connect`` (ex.: ``allow_local_infile=True``).
+    """
+
+    kwargs = {**SETTINGS.as_mysql_kwargs(), "autocommit": False, **extra}
+    return ConnectionHandle(_DirectConnector(kwargs))
+
+
+__all__ = ["SETTINGS", "DATABASE", "Database", "DatabaseSettings", "conectar", "conectar_direto"]
@@ -1,6 +1,11 @@
 import json
 import uuid
-from database import conectar
+from database import conectar_direto
+
+try:  # leitura em streaming do JSON; sem ijson cai no json.load
+    import ijson
+except ImportError:  # pragma: no cover - dependência opcional
+    ijson = None
 
 # Nome do arquivo JSON com os dados que você me mandou
 # Salva aquele JSON que você me passou como "empresas_integracao.json"
@@ -9,101 +14,182 @@ ARQUIVO_JSON = "empresas_integracao.json"
 # Nome do banco que você criou
 NOME_DB = "sistema_integracao"
 
+# Quantas empresas vão em cada executemany
+TAMANHO_LOTE = 500
+
+SQL_EMPRESA = """
+    INSERT IGNORE INTO empresas_integracao
+    (id, empresa, cod, cod_athenas, top10, prioridade_empresa)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+# Tarefas vão num INSERT com vários VALUES; o limite de tuplas por
+# comando segura o tamanho do pacote abaixo do max_allowed_packet
+MAX_TUPLAS_INSERT = 1000
+
+SQL_TAREFA = """
+    INSERT INTO tarefas_integracao
+    (empresa_id, p1, p2, tipo, status, prioridade_tarefa, mes)
+    VALUES {valores}
+"""
+VALORES_TAREFA = "(%s, %s, %s, %s, %s, %s, %s)"
+
+
+def _ler_empresas(f):
+    """Itera as empresas do JSON; com ijson vai lendo aos poucos, sem
+    carregar o arquivo inteiro na memória."""
+    if ijson is not None:
+        yield from ijson.items(f, "item")
+    else:
+        yield from json.load(f)
+
+
+def _norm(d, chave, padrao=""):
+    """Valor de texto do JSON sem espaços nas pontas; vazio/None vira ``padrao``."""
+    v = d.get(chave)
+    return v.strip() if v else padrao
+
+
+def _linhas_empresa(empresa):
+    """Converte uma empresa do JSON em (linha_empresa, [linhas_tarefa])."""
+    empresa_id = empresa.get("id") or str(uuid.uuid4())
+    nome_empresa = _norm(empresa, "empresa")
+    cod = _norm(empresa, "cod")
+    cod_athenas = _norm(empresa, "cod_athenas")
+    top10_flag = 1 if empresa.get("top10", False) else 0
+    prioridade_empresa = _norm(empresa, "prioridade", "Média")
+
+    linha_empresa = (
+        empresa_id,
+        nome_empresa,
+        cod,
+        cod_athenas,
+        top10_flag,
+        prioridade_empresa
+    )
+
+    linhas_tarefa = []
+    tarefas = empresa.get("tarefas", [])
+    for tarefa in tarefas:
+        # tipo primeiro: tarefa sem tipo é descartada sem tratar o resto
+        tipo = _norm(tarefa, "tipo")            # Ex: "LFS"
+        if tipo == "":
+            print(f"⚠️ Pulando tarefa sem tipo para empresa {nome_empresa}")
+            continue
+
+        p1 = _norm(tarefa, "p1")
+        p2 = _norm(tarefa, "p2")
+        status = _norm(tarefa, "status", "Pendente")  # Ex: "Pendente"
+        prioridade_tarefa = _norm(tarefa, "prioridade", "Média")  # Ex: "TOP 10"
+        mes = _norm(tarefa, "mes")               # Ex: "2025-10" (ou vazio no JSON)
+
+        linhas_tarefa.append((
+            empresa_id,
+            p1,
+            p2,
+            tipo,
+            status,
+            prioridade_tarefa,
+            mes
+        ))
+
+    return linha_empresa, linhas_tarefa
+
 
 def importar_json():
-    # 1. Ler o arquivo JSON
+    # 1. Abrir o arquivo JSON (as empresas são lidas durante a gravação)
     try:
-        with open(ARQUIVO_JSON, "r", encoding="utf-8") as f:
-            empresas_data = json.load(f)
+        f = open(ARQUIVO_JSON, "rb")
     except Exception as e:
         print("❌ Erro lendo o JSON:", e)
         return
 
-    print(f"📂 Carregadas {len(empresas_data)} empresas do JSON")
-
-    # 2. Conectar no banco
+    # 2. Conectar no banco e gravar em lotes enquanto lê
     try:
-        conn = conectar()
-    except Exception as e:
-        print("❌ Erro conectando no banco via conectar():", e)
-        return
+        # o banco vai no handshake da conexão, sem "USE" depois
+        with f, conectar_direto(database=NOME_DB) as conn:
+            # INSERT IGNORE não dá erro em empresa repetida, só warning:
+            # com get_warnings o conector lê o SHOW WARNINGS sozinho (só
+            # quando o servidor avisa que há algum)
+            conn.get_warnings = True
+            cur = conn.cursor()
+            # lotes cheios de tarefas têm sempre o mesmo texto de INSERT:
+            # o cursor preparado compila uma vez e nos próximos só manda os valores
+            tarefa_cur = conn.cursor(prepared=True)
+            sql_lote_cheio = SQL_TAREFA.format(valores=", ".join([VALORES_TAREFA] * MAX_TUPLAS_INSERT))
+
+            empresas_buf = []
+            tarefas_buf = []
+            total_empresas = 0
+            total_tarefas = 0
+            total_ignoradas = 0
+
+            def gravar_empresas():
+                # Empresas: INSERT IGNORE, se já existir (mesmo id) só pula,
+                # mas avisa quais ficaram de fora (como o INSERT linha a linha fazia)
+                nonlocal total_ignoradas
+                if empresas_buf:
+                    cur.executemany(SQL_EMPRESA, empresas_buf)
+                    avisos = cur.fetchwarnings() or []
+                    for _nivel, _codigo, mensagem in avisos:
+                        print(f"⚠️ Aviso: empresa não inserida. Pode já existir. Detalhe: {mensagem}")
+                    if avisos:
+                        print(f"⚠️ {len(avisos)} aviso(s) no lote de {len(empresas_buf)} empresas")
+                    total_ignoradas += len(avisos)
+                    empresas_buf.clear()
+
+            def gravar_tarefas(lote):
+                valores = [v for row in lote for v in row]
+                if len(lote) == MAX_TUPLAS_INSERT:
+                    tarefa_cur.execute(sql_lote_cheio, valores)
+                else:
+                    # último lote (menor): texto diferente, vai pelo cursor normal
+                    sql = SQL_TAREFA.format(valores=", ".join([VALORES_TAREFA] * len(lote)))
+                    cur.execute(sql, valores)
 
-    try:
-        cur = conn.cursor()
-
-        # 2.1 Garantir que estamos usando o banco certo
-        cur.execute(f"USE {NOME_DB};")
-
-        # 3. Inserir cada empresa e suas tarefas
-        for empresa in empresas_data:
-            empresa_id = empresa.get("id") or str(uuid.uuid4())
-            nome_empresa = (empresa.get("empresa") or "").strip()
-            cod = (empresa.get("cod") or "").strip()
-            cod_athenas = (empresa.get("cod_athenas") or "").strip()
-            top10_flag = 1 if empresa.get("top10", False) else 0
-            prioridade_empresa = (empresa.get("prioridade") or "Média").strip()
-
-            # 3.1 Inserir empresa
-            # OBS: Se a empresa já existir (mesmo id), a gente ignora o erro e segue
             try:
-                cur.execute("""
-                    INSERT INTO empresas_integracao
-                    (id, empresa, cod, cod_athenas, top10, prioridade_empresa)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (
-                    empresa_id,
-                    nome_empresa,
-                    cod,
-                    cod_athenas,
-                    top10_flag,
-                    prioridade_empresa
-                ))
+                # tudo numa transação só, com um commit (um flush do redo log)
+                # no fim; se algo falhar o rollback desfaz empresas e tarefas
+                conn.start_transaction(isolation_level="READ COMMITTED")
+
+                for empresa in _ler_empresas(f):
+                    linha_empresa, linhas_tarefa = _linhas_empresa(empresa)
+                    empresas_buf.append(linha_empresa)
+                    tarefas_buf.extend(linhas_tarefa)
+                    total_empresas += 1
+                    total_tarefas += len(linhas_tarefa)
+
+                    if len(empresas_buf) >= TAMANHO_LOTE:
+                        gravar_empresas()
+
+                    if len(tarefas_buf) >= MAX_TUPLAS_INSERT:
+                        # empresas pendentes antes das tarefas que apontam pra elas
+                        gravar_empresas()
+                        while len(tarefas_buf) >= MAX_TUPLAS_INSERT:
+                            gravar_tarefas(tarefas_buf[:MAX_TUPLAS_INSERT])
+                            del tarefas_buf[:MAX_TUPLAS_INSERT]
+
+                # o que sobrou nos buffers
+                gravar_empresas()
+                if tarefas_buf:
+                    gravar_tarefas(tarefas_buf)
+
+                # 3. Confirmar
+                conn.commit()
+                print(f"✅ Importação concluída e salva no banco! "
+                      f"({total_empresas} empresas, {total_tarefas} tarefas)")
+                if total_ignoradas:
+                    print(f"⚠️ {total_ignoradas} aviso(s) ao inserir empresas (repetidas/restrições)")
+
             except Exception as e:
-                print(f"⚠️ Aviso: não consegui inserir empresa '{nome_empresa}' ({empresa_id}). "
-                      f"Pode já existir. Detalhe: {e}")
-
-            # 3.2 Inserir tarefas dessa empresa
-            tarefas = empresa.get("tarefas", [])
-            for tarefa in tarefas:
-                p1 = (tarefa.get("p1") or "").strip()
-                p2 = (tarefa.get("p2") or "").strip()
-                tipo = (tarefa.get("tipo") or "").strip()            # Ex: "LFS"
-                status = (tarefa.get("status") or "Pendente").strip()  # Ex: "Pendente"
-                prioridade_tarefa = (tarefa.get("prioridade") or "Média").strip()  # Ex: "TOP 10"
-                mes = (tarefa.get("mes") or "").strip()               # Ex: "2025-10" (ou vazio no JSON)
-
-                if tipo == "":
-                    print(f"⚠️ Pulando tarefa sem tipo para empresa {nome_empresa}")
-                    continue
-
-                cur.execute("""
-                    INSERT INTO tarefas_integracao
-                    (empresa_id, p1, p2, tipo, status, prioridade_tarefa, mes)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    empresa_id,
-                    p1,
-                    p2,
-                    tipo,
-                    status,
-                    prioridade_tarefa,
-                    mes
-                ))
-
-        # 4. Confirmar
-        conn.commit()
-        print("✅ Importação concluída e salva no banco!")
+                print("💥 Erro geral durante a importação:", e)
+                conn.rollback()
 
+            finally:
+                tarefa_cur.close()
+                cur.close()
     except Exception as e:
-        print("💥 Erro geral durante a importação:", e)
-        conn.rollback()
-
-    finally:
-        try:
-            cur.close()
-            conn.close()
-        except:
-            pass
+        print("❌ Erro conectando no banco via conectar_direto():", e)
 
 
 if __name__ == "__main__":
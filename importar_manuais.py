@@ -1,5 +1,10 @@
 import csv
-from database import conectar
+import os
+from itertools import islice
+
+from mysql.connector import Error, errorcode
+
+from database import conectar_direto
 
 # Ajuste aqui os nomes dos arquivos que você já tem
 ARQUIVOS = [
@@ -14,42 +19,127 @@ ARQUIVOS = [
 ]
 
 
+# O arquivo vai direto pro servidor (LOAD DATA), sem passar linha a linha
+# pelo Python. Até 5 colunas por linha; as que faltarem ficam NULL.
+# ESCAPED BY '' porque CSV não usa barra invertida como escape.
+# Precisa de local_infile=ON no servidor (MySQL 8 vem com OFF); sem isso
+# a importação cai no INSERT em lote (SQL_INSERT) abaixo.
+SQL_LOAD = """
+    LOAD DATA LOCAL INFILE %s
+    INTO TABLE manuais_conteudo
+    CHARACTER SET utf8mb4
+    FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+    LINES TERMINATED BY {fim_linha}
+    (@c1, @c2, @c3, @c4, @c5)
+    SET categoria = %s,
+        campo1 = @c1,
+        campo2 = @c2,
+        campo3 = @c3,
+        campo4 = @c4,
+        campo5 = @c5
+"""
+
+SQL_INSERT = """
+    INSERT INTO manuais_conteudo
+    (categoria, campo1, campo2, campo3, campo4, campo5)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+# Quantas linhas do CSV vão em cada executemany (caminho sem LOAD DATA)
+TAMANHO_LOTE = 1000
+
+# erros de LOAD DATA LOCAL desligado (no servidor ou no cliente)
+_ERROS_LOCAL_INFILE = {
+    getattr(errorcode, nome)
+    for nome in (
+        "ER_NOT_ALLOWED_COMMAND",
+        "ER_CLIENT_LOCAL_FILES_DISABLED",
+        "CR_LOAD_DATA_LOCAL_INFILE_REJECTED",
+    )
+    if hasattr(errorcode, nome)
+}
+
+
+def _fim_de_linha(caminho):
+    # CSV salvo no Windows vem com \r\n; sem isso o \r fica grudado no último campo
+    with open(caminho, "rb") as f:
+        primeira = f.readline()
+    return "'\\r\\n'" if primeira.endswith(b"\r\n") else "'\\n'"
+
+
+def _local_infile_ligado(cursor):
+    cursor.execute("SELECT @@GLOBAL.local_infile")
+    return bool(int(cursor.fetchone()[0]))
+
+
+def _linhas(reader, categoria):
+    # row é uma lista com as colunas do CSV.
+    # vamos enfiar até 5 colunas por linha, completando com None
+    for row in reader:
+        row = row[:5] + [None] * (5 - len(row))
+        yield (categoria, row[0], row[1], row[2], row[3], row[4])
+
+
+def _inserir_em_lotes(cursor, caminho, categoria):
+    total = 0
+    with open(caminho, "r", encoding="utf-8", newline="") as f:
+        it = _linhas(csv.reader(f), categoria)
+        while True:
+            lote = list(islice(it, TAMANHO_LOTE))
+            if not lote:
+                break
+            cursor.executemany(SQL_INSERT, lote)
+            total += len(lote)
+    return total
+
+
 def importar_csv_para_banco():
-    conn = conectar()
-    cursor = conn.cursor()
-
-    for item in ARQUIVOS:
-        categoria = item["categoria"]
-        caminho = item["arquivo"]
-
-        print(f"📥 Importando '{caminho}' como categoria '{categoria}'")
-
-        # apaga dados antigos dessa categoria pra não duplicar
-        cursor.execute("DELETE FROM manuais_conteudo WHERE categoria = %s", (categoria,))
-
-        with open(caminho, "r", encoding="utf-8") as f:
-            reader = csv.reader(f)
-            for row in reader:
-                # row é uma lista com as colunas do CSV.
-                # vamos enfiar até 5 colunas por linha, completando com None
-                c1 = row[0] if len(row) > 0 else None
-                c2 = row[1] if len(row) > 1 else None
-                c3 = row[2] if len(row) > 2 else None
-                c4 = row[3] if len(row) > 3 else None
-                c5 = row[4] if len(row) > 4 else None
-
-                cursor.execute(
-                    """
-                    INSERT INTO manuais_conteudo
-                    (categoria, campo1, campo2, campo3, campo4, campo5)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    """,
-                    (categoria, c1, c2, c3, c4, c5)
-                )
-
-    conn.commit()
-    cursor.close()
-    conn.close()
+    # conexão avulsa: LOAD DATA LOCAL precisa de allow_local_infile,
+    # que não deve ficar ligado nas conexões do pool do painel
+    with conectar_direto(allow_local_infile=True) as conn:
+        cursor = conn.cursor()
+        try:
+            # tudo numa transação só: ou importa os dois arquivos, ou nada
+            # (a checagem vem depois: com autocommit desligado o SELECT já
+            # abriria a transação e o start_transaction recusaria)
+            conn.start_transaction()
+
+            usar_load = _local_infile_ligado(cursor)
+            if not usar_load:
+                print("ℹ️ local_infile desligado no servidor: importando com INSERT em lote")
+
+            for item in ARQUIVOS:
+                categoria = item["categoria"]
+                caminho = os.path.abspath(item["arquivo"])
+
+                print(f"📥 Importando '{caminho}' como categoria '{categoria}'")
+
+                # apaga dados antigos dessa categoria pra não duplicar
+                cursor.execute("DELETE FROM manuais_conteudo WHERE categoria = %s", (categoria,))
+
+                if usar_load:
+                    try:
+                        sql = SQL_LOAD.format(fim_linha=_fim_de_linha(caminho))
+                        cursor.execute(sql, (caminho, categoria))
+                        print(f"   {cursor.rowcount} linhas carregadas")
+                        continue
+                    except Error as e:
+                        if e.errno not in _ERROS_LOCAL_INFILE:
+                            raise
+                        # recusado mesmo assim (cliente/driver): segue no INSERT
+                        print(f"ℹ️ LOAD DATA LOCAL recusado ({e}); importando com INSERT em lote")
+                        usar_load = False
+
+                total = _inserir_em_lotes(cursor, caminho, categoria)
+                print(f"   {total} linhas inseridas")
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
     print("✅ Importação finalizada com sucesso!")
 
 
@@ -1,4 +1,6 @@
-from database import conectar
+from mysql.connector import Error
+
+from database import conectar_direto
 
 def limpar_produtos():
     """Remove módulos duplicados sem data e garante que existam apenas os 6 fixos."""
@@ -12,55 +14,70 @@ def limpar_produtos():
     ]
 
     try:
-        conn = conectar()
-        cursor = conn.cursor()
-
-        # Remove registros duplicados ou sem data
-        cursor.execute("""
-            DELETE FROM produtos
-            WHERE ultimo_acesso IS NULL
-              AND nome IN (
-                'Controle da Integração',
-                'Macro da Regina',
-                'Macro da Folha',
-                'Macro do Fiscal',
-                'Formatador de Balancete',
-                'Manuais'
-              );
-        """)
-        conn.commit()
-
-        # Garante que todos os 6 módulos fixos existam
-        for nome in modulos_fixos:
-            cursor.execute("SELECT COUNT(*) FROM produtos WHERE nome = %s", (nome,))
-            count = cursor.fetchone()[0]
-            if count == 0:
-                cursor.execute(
-                    "INSERT INTO produtos (nome, status, ultimo_acesso) VALUES (%s, 'Pronto', NOW())",
-                    (nome,),
-                )
-                print(f"✅ Criado módulo ausente: {nome}")
+        with conectar_direto() as conn:
+            cursor = conn.cursor()
 
-        conn.commit()
+            # Remove registros duplicados ou sem data
+            cursor.execute("""
+                DELETE FROM produtos
+                WHERE ultimo_acesso IS NULL
+                  AND nome IN (
+                    'Controle da Integração',
+                    'Macro da Regina',
+                    'Macro da Folha',
+                    'Macro do Fiscal',
+                    'Formatador de Balancete',
+                    'Manuais'
+                  );
+            """)
+            conn.commit()
 
-        # Cria índice único no nome (impede duplicação futura)
-        try:
-            cursor.execute("ALTER TABLE produtos ADD UNIQUE INDEX idx_nome_unico (nome);")
+            # Garante que todos os 6 módulos fixos existam, num comando só:
+            # o servidor faz a diferença entre a lista fixa e o que já está
+            # na tabela (UNION ALL em vez de VALUES ROW pra rodar em MySQL < 8.0.19).
+            # Vem antes do índice: se o ALTER falhar, os módulos já estão lá.
+            lista = " UNION ALL ".join(["SELECT %s AS nome"] * len(modulos_fixos))
+            cursor.execute(f"""
+                INSERT INTO produtos (nome, status, ultimo_acesso)
+                SELECT f.nome, 'Pronto', NOW()
+                FROM ({lista}) AS f
+                WHERE NOT EXISTS (SELECT 1 FROM produtos p WHERE p.nome = f.nome);
+            """, modulos_fixos)
+            if cursor.rowcount > 0:
+                print(f"✅ Criados {cursor.rowcount} módulo(s) ausente(s).")
             conn.commit()
-            print("🔒 Índice único criado com sucesso (nome).")
-        except Exception as e:
-            if "Duplicate key name" in str(e):
+
+            # Índice único no nome (impede duplicação futura). Procura pela
+            # coluna, não pelo nome do índice: o schema já declara
+            # nome UNIQUE, e um idx_nome_unico a mais seria redundante.
+            # Consultar o catálogo também evita o ALTER (DDL + commit
+            # implícito) em toda execução.
+            cursor.execute("""
+                SELECT index_name
+                FROM information_schema.STATISTICS
+                WHERE table_schema = DATABASE()
+                  AND table_name = 'produtos'
+                  AND non_unique = 0
+                GROUP BY index_name
+                HAVING COUNT(*) = 1 AND MAX(column_name) = 'nome'
+                LIMIT 1;
+            """)
+            if cursor.fetchone():
                 print("ℹ️ Índice único já existe, tudo certo.")
             else:
-                raise e
+                try:
+                    cursor.execute("ALTER TABLE produtos ADD UNIQUE INDEX idx_nome_unico (nome);")
+                    print("🔒 Índice único criado com sucesso (nome).")
+                except Error as e:
+                    # sobrou nome duplicado (com ultimo_acesso preenchido):
+                    # segue sem o índice, os módulos já foram garantidos acima
+                    print(f"⚠️ Não foi possível criar o índice único (nome): {e}")
 
-        cursor.close()
-        conn.close()
+            cursor.close()
         print("\n🧹 Limpeza concluída com sucesso! Módulos duplicados removidos e estrutura protegida.")
 
     except Exception as e:
         print(f"❌ Erro ao limpar produtos: {e}")
 
-
 if __name__ == "__main__":
     limpar_produtos()
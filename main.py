@@ -2,17 +2,93 @@
 
 from __future__ import annotations
 
+import logging
 import os
 from typing import Optional
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
-from painel_admin import PainelAdmin
-from painel_user import PainelUser
 from utils import AuthService, Usuario
 
 os.environ.setdefault("QT_OPENGL", "software")
 
+LOGGER = logging.getLogger(__name__)
+
+# Folha de estilo da tela de login, aplicada uma vez no QApplication em run().
+# Tudo fica sob #LoginWindow para não vazar para os painéis, que têm a sua.
+# A cor do status vem da propriedade dinâmica "estado" (erro/ok).
+_APP_QSS = """
+#LoginWindow, #LoginWindow QWidget { background-color: #0f172a; color: #e2e8f0; font-family: 'Segoe UI'; }
+#LoginWindow QLabel#Titulo { font-size: 24px; font-weight: bold; color: #38bdf8; }
+#LoginWindow QLineEdit {
+    background-color: #1e293b;
+    border: 1px solid #334155;
+    border-radius: 6px;
+    padding: 10px;
+    color: #e2e8f0;
+}
+#LoginWindow QPushButton {
+    background-color: #38bdf8;
+    color: #020617;
+    font-weight: 600;
+    border-radius: 6px;
+    padding: 10px;
+}
+#LoginWindow QPushButton:hover { background-color: #0ea5e9; }
+#LoginWindow QLabel#StatusMensagem { color: #f87171; font-size: 12px; }
+#LoginWindow QLabel#StatusMensagem[estado="ok"] { color: #38bdf8; }
+#LoginWindow QToolButton { border: none; background: transparent; }
+"""
+
+# Ícone do botão de mostrar/ocultar senha: a elipse 14x8 em #38bdf8 (traço de
+# 2px, com antialiasing) que antes era desenhada com QPainter, já gravada em
+# PNG. Decodificado uma vez por processo e reaproveitado por toda LoginWindow
+# criada depois (precisa de QApplication, por isso é criado sob demanda)
+_SENHA_ICON_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d494844520000001200000012080600000056ce8e57000000"
+    "834944415478da63b0d8fb83811a98616419a400c43540bc1b889f03f17f287e0e15ab81"
+    "aac169900010cf06e2df489a71e1df50b502e8068900f175a8a2f740dc0fc41e402c8164"
+    "910454ac1faae63f548f08b241f3a11287611204b00854ed7fa85eb8419fa182322404b0"
+    "0c54cf679a184435af512db0a916fd544d90a3b91f3b0600cf9bb4bbe9ab601d00000000"
+    "49454e44ae426082"
+)
+_SENHA_ICON: Optional[QtGui.QIcon] = None
+
+
+def _icone_senha() -> QtGui.QIcon:
+    global _SENHA_ICON
+    if _SENHA_ICON is None:
+        pixmap = QtGui.QPixmap()
+        pixmap.loadFromData(_SENHA_ICON_PNG, "PNG")
+        _SENHA_ICON = QtGui.QIcon(pixmap)
+    return _SENHA_ICON
+
+
+class _LoginSignals(QtCore.QObject):
+    succeeded = QtCore.Signal(object)
+    failed = QtCore.Signal(object)
+
+
+class _LoginWorker(QtCore.QRunnable):
+    """Consulta o usuário e confere a senha (bcrypt) fora da thread da GUI."""
+
+    def __init__(self, auth: AuthService, usuario: str, senha: str):
+        super().__init__()
+        self._auth = auth
+        self._usuario = usuario
+        self._senha = senha
+        self.signals = _LoginSignals()
+
+    def run(self) -> None:  # pragma: no cover - executado fora da thread principal
+        try:
+            resultado = self._auth.authenticate(self._usuario, self._senha)
+        except Exception as exc:  # pragma: no cover - repassado ao Qt
+            if not isinstance(exc, ValueError):
+                LOGGER.exception("Worker de login falhou")
+            self.signals.failed.emit(exc)
+        else:
+            self.signals.succeeded.emit(resultado)
+
 
 class LoginWindow(QtWidgets.QMainWindow):
     """Tela inicial responsável pelo fluxo de autenticação."""
@@ -24,38 +100,13 @@ class LoginWindow(QtWidgets.QMainWindow):
 
         self.setWindowTitle("Painel de Integração - Login")
         self.setFixedSize(460, 340)
-        self.setWindowIcon(QtGui.QIcon())
-        self._configurar_estilos()
+        # o visual vem do _APP_QSS aplicado uma vez no QApplication (run())
+        self.setObjectName("LoginWindow")
         self._montar_interface()
 
     # ------------------------------------------------------------------
     # Construção da interface
     # ------------------------------------------------------------------
-    def _configurar_estilos(self) -> None:
-        self.setStyleSheet(
-            """
-            QWidget { background-color: #0f172a; color: #e2e8f0; font-family: 'Segoe UI'; }
-            QLabel#Titulo { font-size: 24px; font-weight: bold; color: #38bdf8; }
-            QLineEdit {
-                background-color: #1e293b;
-                border: 1px solid #334155;
-                border-radius: 6px;
-                padding: 10px;
-                color: #e2e8f0;
-            }
-            QPushButton {
-                background-color: #38bdf8;
-                color: #020617;
-                font-weight: 600;
-                border-radius: 6px;
-                padding: 10px;
-            }
-            QPushButton:hover { background-color: #0ea5e9; }
-            QLabel#StatusMensagem { color: #f87171; font-size: 12px; }
-            QToolButton { border: none; background: transparent; }
-            """
-        )
-
     def _montar_interface(self) -> None:
         container = QtWidgets.QWidget()
         layout = QtWidgets.QVBoxLayout(container)
@@ -78,7 +129,7 @@ class LoginWindow(QtWidgets.QMainWindow):
         senha_layout.addWidget(self.input_senha)
 
         self.btn_toggle_senha = QtWidgets.QToolButton()
-        self.btn_toggle_senha.setIcon(self._icone_senha())
+        self.btn_toggle_senha.setIcon(_icone_senha())
         self.btn_toggle_senha.setCheckable(True)
         self.btn_toggle_senha.setToolTip("Mostrar/ocultar senha")
         self.btn_toggle_senha.clicked.connect(self._alternar_senha)
@@ -104,12 +155,6 @@ class LoginWindow(QtWidgets.QMainWindow):
     # ------------------------------------------------------------------
     # Eventos e interações
     # ------------------------------------------------------------------
-    def keyPressEvent(self, event: QtGui.QKeyEvent) -> None:  # noqa: D401 - assinatura Qt
-        if event.key() in (QtCore.Qt.Key_Return, QtCore.Qt.Key_Enter):
-            self._tentar_login()
-        else:
-            super().keyPressEvent(event)
-
     def closeEvent(self, event: QtGui.QCloseEvent) -> None:
         if self._painel_aberto is not None:
             self._painel_aberto.close()
@@ -121,20 +166,15 @@ class LoginWindow(QtWidgets.QMainWindow):
             QtWidgets.QLineEdit.Normal if modo == QtWidgets.QLineEdit.Password else QtWidgets.QLineEdit.Password
         )
 
-    def _icone_senha(self) -> QtGui.QIcon:
-        pixmap = QtGui.QPixmap(18, 18)
-        pixmap.fill(QtCore.Qt.transparent)
-        painter = QtGui.QPainter(pixmap)
-        painter.setRenderHint(QtGui.QPainter.Antialiasing)
-        painter.setPen(QtGui.QPen(QtGui.QColor("#38bdf8"), 2))
-        painter.drawEllipse(2, 5, 14, 8)
-        painter.end()
-        return QtGui.QIcon(pixmap)
-
     # ------------------------------------------------------------------
     # Autenticação
     # ------------------------------------------------------------------
     def _tentar_login(self) -> None:
+        # enquanto uma validação está rodando o botão fica desabilitado;
+        # o returnPressed dos campos continua chegando, então confere aqui
+        if not self.btn_login.isEnabled():
+            return
+
         usuario = self.input_usuario.text().strip()
         senha = self.input_senha.text().strip()
 
@@ -145,18 +185,13 @@ class LoginWindow(QtWidgets.QMainWindow):
         self.btn_login.setEnabled(False)
         self._exibir_status("Validando credenciais...", erro=False)
 
-        try:
-            autenticado = self._auth.authenticate(usuario, senha)
-        except ValueError as exc:
-            self._exibir_status(str(exc), erro=True)
-            self.btn_login.setEnabled(True)
-            return
-        except Exception as exc:
-            QtWidgets.QMessageBox.critical(self, "Erro", f"Falha ao autenticar:\n{exc}")
-            self._exibir_status("Não foi possível concluir o login.", erro=True)
-            self.btn_login.setEnabled(True)
-            return
+        worker = _LoginWorker(self._auth, usuario, senha)
+        worker.signals.succeeded.connect(self._on_login_concluido)
+        worker.signals.failed.connect(self._on_login_erro)
+        QtCore.QThreadPool.globalInstance().start(worker)
 
+    @QtCore.Slot(object)
+    def _on_login_concluido(self, autenticado: Optional[Usuario]) -> None:
         if not autenticado:
             self._exibir_status("Usuário ou senha inválidos.", erro=True)
             self.btn_login.setEnabled(True)
@@ -165,20 +200,40 @@ class LoginWindow(QtWidgets.QMainWindow):
         self._abrir_painel(autenticado)
         self.btn_login.setEnabled(True)
 
+    @QtCore.Slot(object)
+    def _on_login_erro(self, exc: Exception) -> None:
+        if isinstance(exc, ValueError):
+            self._exibir_status(str(exc), erro=True)
+        else:
+            QtWidgets.QMessageBox.critical(self, "Erro", f"Falha ao autenticar:\n{exc}")
+            self._exibir_status("Não foi possível concluir o login.", erro=True)
+        self.btn_login.setEnabled(True)
+
     def _exibir_status(self, mensagem: str, *, erro: bool) -> None:
         self.lbl_status.setText(mensagem)
-        cor = "#f87171" if erro else "#38bdf8"
-        self.lbl_status.setStyleSheet(f"color: {cor};")
+        # troca só a propriedade e repolir o label; nada de setStyleSheet
+        # (que reprocessaria a folha inteira a cada mensagem)
+        estado = "erro" if erro else "ok"
+        if self.lbl_status.property("estado") != estado:
+            self.lbl_status.setProperty("estado", estado)
+            estilo = self.lbl_status.style()
+            estilo.unpolish(self.lbl_status)
+            estilo.polish(self.lbl_status)
 
     def _abrir_painel(self, usuario: Usuario) -> None:
         if self._painel_aberto is not None:
             self._painel_aberto.close()
 
+        # os painéis (e tudo que eles importam) só carregam depois do login
         painel: QtWidgets.QWidget
         destino = usuario.tipo.lower()
         if destino == "admin":
+            from painel_admin import PainelAdmin
+
             painel = PainelAdmin(usuario.to_dict())
         else:
+            from painel_user import PainelUser
+
             painel = PainelUser(usuario.to_dict())
 
         painel.setAttribute(QtCore.Qt.WA_DeleteOnClose)
@@ -187,7 +242,13 @@ class LoginWindow(QtWidgets.QMainWindow):
 
         self._painel_aberto = painel
         self.hide()
-        QtWidgets.QMessageBox.information(self, "Login realizado", f"Bem-vindo, {usuario.nome}!")
+        # boas-vindas só depois que o painel pintar a primeira vez; o
+        # diálogo modal aberto aqui seguraria o primeiro paint
+        QtCore.QTimer.singleShot(
+            0,
+            painel,
+            lambda: QtWidgets.QMessageBox.information(painel, "Login realizado", f"Bem-vindo, {usuario.nome}!"),
+        )
 
     def _retornar_para_login(self, event: QtGui.QCloseEvent) -> None:
         self._painel_aberto = None
@@ -199,7 +260,11 @@ class LoginWindow(QtWidgets.QMainWindow):
 def run() -> None:
     app = QtWidgets.QApplication([])
     app.setWindowIcon(QtGui.QIcon())
-    janela = LoginWindow()
+    app.setStyleSheet(_APP_QSS)
+    # um AuthService para o processo inteiro (repositório e serviço de
+    # produtos já usam o pool de conexões); não depende da janela
+    auth = AuthService()
+    janela = LoginWindow(auth_service=auth)
     janela.show()
     app.exec()
 
@@ -1,27 +1,57 @@
 # manuais_bridge.py
 
 import threading
-from PySide6 import QtWidgets
+import time
+from PySide6 import QtCore, QtWidgets
 from database import conectar
-from tkinter import messagebox, Tk
-import manuais  # seu módulo que tem abrir_manuais()
 
 
-def checar_status_modulo(nome_modulo: str) -> str | None:
+# Status dos módulos muda raramente (só pelo painel do admin); guarda por
+# alguns segundos em vez de ir ao banco a cada clique em "Manuais".
+_STATUS_TTL = 30.0
+_STATUS_CACHE: dict[str, tuple[float, str | None]] = {}
+_STATUS_LOCK = threading.Lock()
+
+
+def status_modulo(nome_modulo: str) -> str | None:
     """
-    Retorna o status atual do módulo no banco ou None se não achar.
+    Status do módulo (com cache de _STATUS_TTL segundos) ou None se não
+    existir. Erro de banco sobe para quem chamou.
     """
-    try:
-        conn = conectar()
+    agora = time.monotonic()
+    with _STATUS_LOCK:
+        item = _STATUS_CACHE.get(nome_modulo)
+    if item is not None and agora - item[0] < _STATUS_TTL:
+        return item[1]
+
+    with conectar() as conn:
         cursor = conn.cursor(dictionary=True)
         cursor.execute("SELECT status FROM produtos WHERE nome = %s", (nome_modulo,))
         row = cursor.fetchone()
         cursor.close()
-        conn.close()
 
-        if not row:
-            return None
-        return row["status"]
+    status = row["status"] if row else None
+    with _STATUS_LOCK:
+        _STATUS_CACHE[nome_modulo] = (agora, status)
+    return status
+
+
+def invalidar_status(nome_modulo: str | None = None) -> None:
+    """Descarta o status em cache do módulo (ou de todos, sem argumento).
+    Chamar depois de alterar o status no banco."""
+    with _STATUS_LOCK:
+        if nome_modulo is None:
+            _STATUS_CACHE.clear()
+        else:
+            _STATUS_CACHE.pop(nome_modulo, None)
+
+
+def checar_status_modulo(nome_modulo: str) -> str | None:
+    """
+    Retorna o status atual do módulo no banco ou None se não achar.
+    """
+    try:
+        return status_modulo(nome_modulo)
     except Exception as e:
         print(f"Erro ao checar status do módulo {nome_modulo}: {e}")
         return None
@@ -31,7 +61,7 @@ def abrir_manuais_via_qt(parent_qt_widget: QtWidgets.QWidget):
     """
     Chamado pelo botão 'Manuais' do painel (Qt).
     - Valida status no banco.
-    - Se ok, abre o Tkinter em uma thread separada.
+    - Se ok, abre a janela de manuais (Qt, painel_manuais_qt).
     - Se não ok, avisa pro usuário no próprio Qt.
     """
 
@@ -59,17 +89,9 @@ def abrir_manuais_via_qt(parent_qt_widget: QtWidgets.QWidget):
         )
         return
 
-    # Se chegou aqui = pode abrir
-    # Agora vem o pulo do gato:
-    # - Tkinter precisa rodar seu próprio mainloop.
-    # - Se a gente rodar direto, ele congela o PySide6.
-    # -> Solução: rodar Tkinter em outra thread.
-    def run_tk():
-        # cria raiz Tk só se ainda não existir
-        root = Tk()
-        root.withdraw()  # esconde a janela raiz
-        # abre a janela de manuais usando o Tk root como parent
-        manuais.abrir_manuais(root)
-        root.mainloop()
-
-    threading.Thread(target=run_tk, daemon=True).start()
+    # Se chegou aqui = pode abrir; a janela roda no mesmo event loop do painel
+    from painel_manuais_qt import ManuaisWindow
+
+    janela = ManuaisWindow(parent_qt_widget)
+    janela.setAttribute(QtCore.Qt.WA_DeleteOnClose)
+    janela.show()
@@ -8,7 +8,7 @@ from typing import Callable, List
 from PySide6 import QtCore, QtGui, QtWidgets
 
 from controle_integracao.controle_integracao import ControleIntegracao
-from manuais_bridge import abrir_manuais_via_qt
+from manuais_bridge import abrir_manuais_via_qt, invalidar_status
 from painel_administracao import PainelAdministracao
 from painel_base import BasePainelWindow, ProductCard
 from services.produtos_service import Produto, ProdutoService, ProdutoStatus
@@ -45,6 +45,9 @@ class PainelAdmin(BasePainelWindow):
         self._service = ProdutoService()
         self._thread_pool = QtCore.QThreadPool.globalInstance()
         self._timer = QtCore.QTimer(self)
+        # polling de 3,5 s não precisa de precisão: VeryCoarse arredonda para
+        # o segundo e deixa o sistema agrupar os despertares
+        self._timer.setTimerType(QtCore.Qt.VeryCoarseTimer)
         self._timer.setInterval(self.REFRESH_INTERVAL_MS)
         self._timer.timeout.connect(self._schedule_refresh)
         self._refreshing = False
@@ -121,6 +124,7 @@ class PainelAdmin(BasePainelWindow):
     def _alterar_status(self, produto: Produto, novo_status: str) -> None:
         try:
             self._service.atualizar_status(produto.id, novo_status)  # type: ignore[arg-type]
+            invalidar_status(produto.nome)
         except Exception as exc:
             self.logger.exception("Falha ao alterar status do produto %s", produto.id)
             QtWidgets.QMessageBox.critical(
@@ -1,9 +1,33 @@
 from PySide6 import QtWidgets, QtCore
 from database import conectar
+from manuais_bridge import invalidar_status
 import bcrypt
 from datetime import datetime
 
 
+class _HashSignals(QtCore.QObject):
+    pronto = QtCore.Signal(str)
+    falhou = QtCore.Signal(object)
+
+
+class _HashWorker(QtCore.QRunnable):
+    """Gera o hash bcrypt da senha fora da thread da GUI (gensalt + hashpw
+    levam centenas de ms e travariam o diálogo)."""
+
+    def __init__(self, senha):
+        super().__init__()
+        self._senha = senha
+        self.signals = _HashSignals()
+
+    def run(self):
+        try:
+            hash_senha = bcrypt.hashpw(self._senha.encode(), bcrypt.gensalt()).decode()
+        except Exception as e:
+            self.signals.falhou.emit(e)
+        else:
+            self.signals.pronto.emit(hash_senha)
+
+
 class PainelAdministracao(QtWidgets.QTabWidget):
     def __init__(self):
         super().__init__()
@@ -85,14 +109,20 @@ class PainelAdministracao(QtWidgets.QTabWidget):
 
         self.carregar_usuarios()
 
+    def _gerar_hash(self, senha, ao_concluir, ao_falhar):
+        """Dispara o bcrypt no QThreadPool; o resultado volta na thread da GUI."""
+        worker = _HashWorker(senha)
+        worker.signals.pronto.connect(ao_concluir, QtCore.Qt.QueuedConnection)
+        worker.signals.falhou.connect(ao_falhar, QtCore.Qt.QueuedConnection)
+        QtCore.QThreadPool.globalInstance().start(worker)
+
     def carregar_usuarios(self):
         try:
-            conn = conectar()
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT usuario, nome, tipo, data_criacao FROM usuarios ORDER BY data_criacao DESC;")
-            usuarios = cursor.fetchall()
-            cursor.close()
-            conn.close()
+            with conectar() as conn:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute("SELECT usuario, nome, tipo, data_criacao FROM usuarios ORDER BY data_criacao DESC;")
+                usuarios = cursor.fetchall()
+                cursor.close()
 
             self.tabela.setRowCount(len(usuarios))
             for i, user in enumerate(usuarios):
@@ -136,23 +166,28 @@ class PainelAdministracao(QtWidgets.QTabWidget):
                 QtWidgets.QMessageBox.warning(dialog, "Aviso", "Preencha todos os campos.")
                 return
 
-            hash_senha = bcrypt.hashpw(senha_v.encode(), bcrypt.gensalt()).decode()
+            btn_salvar.setEnabled(False)
+            self._gerar_hash(senha_v, lambda hash_senha: gravar(nome_v, usuario_v, hash_senha, tipo_v), falhou)
 
+        def gravar(nome_v, usuario_v, hash_senha, tipo_v):
             try:
-                conn = conectar()
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO usuarios (nome, usuario, senha_hash, tipo, data_criacao)
-                    VALUES (%s, %s, %s, %s, NOW())
-                """, (nome_v, usuario_v, hash_senha, tipo_v))
-                conn.commit()
-                cursor.close()
-                conn.close()
+                with conectar() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("""
+                        INSERT INTO usuarios (nome, usuario, senha_hash, tipo, data_criacao)
+                        VALUES (%s, %s, %s, %s, NOW())
+                    """, (nome_v, usuario_v, hash_senha, tipo_v))
+                    conn.commit()
+                    cursor.close()
                 QtWidgets.QMessageBox.information(dialog, "Sucesso", "Usuário cadastrado com sucesso!")
                 dialog.accept()
                 self.carregar_usuarios()
             except Exception as e:
-                QtWidgets.QMessageBox.critical(dialog, "Erro", f"Erro ao cadastrar:\n{e}")
+                falhou(e)
+
+        def falhou(e):
+            btn_salvar.setEnabled(True)
+            QtWidgets.QMessageBox.critical(dialog, "Erro", f"Erro ao cadastrar:\n{e}")
 
         btn_salvar.clicked.connect(salvar)
         dialog.exec()
@@ -190,25 +225,34 @@ class PainelAdministracao(QtWidgets.QTabWidget):
             tipo_v = tipo.currentText()
             senha_v = senha.text().strip()
 
+            btn_salvar.setEnabled(False)
+            if senha_v:
+                self._gerar_hash(senha_v, lambda hash_senha: gravar(tipo_v, hash_senha), falhou)
+            else:
+                gravar(tipo_v, None)
+
+        def gravar(tipo_v, hash_senha):
             try:
-                conn = conectar()
-                cursor = conn.cursor()
-                if senha_v:
-                    hash_senha = bcrypt.hashpw(senha_v.encode(), bcrypt.gensalt()).decode()
-                    cursor.execute(
-                        "UPDATE usuarios SET tipo=%s, senha_hash=%s WHERE usuario=%s",
-                        (tipo_v, hash_senha, usuario),
-                    )
-                else:
-                    cursor.execute("UPDATE usuarios SET tipo=%s WHERE usuario=%s", (tipo_v, usuario))
-                conn.commit()
-                cursor.close()
-                conn.close()
+                with conectar() as conn:
+                    cursor = conn.cursor()
+                    if hash_senha:
+                        cursor.execute(
+                            "UPDATE usuarios SET tipo=%s, senha_hash=%s WHERE usuario=%s",
+                            (tipo_v, hash_senha, usuario),
+                        )
+                    else:
+                        cursor.execute("UPDATE usuarios SET tipo=%s WHERE usuario=%s", (tipo_v, usuario))
+                    conn.commit()
+                    cursor.close()
                 QtWidgets.QMessageBox.information(dialog, "Sucesso", "Usuário atualizado!")
                 dialog.accept()
                 self.carregar_usuarios()
             except Exception as e:
-                QtWidgets.QMessageBox.critical(dialog, "Erro", f"Erro ao editar:\n{e}")
+                falhou(e)
+
+        def falhou(e):
+            btn_salvar.setEnabled(True)
+            QtWidgets.QMessageBox.critical(dialog, "Erro", f"Erro ao editar:\n{e}")
 
         btn_salvar.clicked.connect(salvar)
         dialog.exec()
@@ -229,12 +273,11 @@ class PainelAdministracao(QtWidgets.QTabWidget):
 
         if confirm == QtWidgets.QMessageBox.Yes:
             try:
-                conn = conectar()
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM usuarios WHERE usuario = %s", (usuario,))
-                conn.commit()
-                cursor.close()
-                conn.close()
+                with conectar() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("DELETE FROM usuarios WHERE usuario = %s", (usuario,))
+                    conn.commit()
+                    cursor.close()
                 QtWidgets.QMessageBox.information(self, "Sucesso", "Usuário excluído!")
                 self.carregar_usuarios()
             except Exception as e:
@@ -273,47 +316,46 @@ class PainelAdministracao(QtWidgets.QTabWidget):
         ]
 
         try:
-            conn = conectar()
-            cursor = conn.cursor(dictionary=True)
-
-            # Busca todos os produtos existentes
-            cursor.execute("SELECT id, nome, status, ultimo_acesso FROM produtos;")
-            existentes = cursor.fetchall()
-            nomes_existentes = [p["nome"] for p in existentes]
-
-            # Cria apenas os que ainda não existem
-            faltantes = [m for m in modulos_fixos if m not in nomes_existentes]
-            for nome in faltantes:
-                cursor.execute(
-                    "INSERT INTO produtos (nome, status, ultimo_acesso) VALUES (%s, 'Pronto', NULL)",
-                    (nome,),
-                )
-            if faltantes:
-                conn.commit()
+            with conectar() as conn:
+                cursor = conn.cursor(dictionary=True)
+
+                # Busca todos os produtos existentes
+                cursor.execute("SELECT id, nome, status, ultimo_acesso FROM produtos;")
+                existentes = cursor.fetchall()
+                nomes_existentes = [p["nome"] for p in existentes]
 
-            # Agora busca apenas os 6 fixos
-            cursor.execute("""
-                SELECT id, nome, status, ultimo_acesso
-                FROM produtos
-                WHERE nome IN (
-                    'Controle da Integração',
-                    'Macro da Regina',
-                    'Macro da Folha',
-                    'Macro do Fiscal',
-                    'Formatador de Balancete',
-                    'Manuais'
-                )
-                ORDER BY FIELD(nome,
-                    'Controle da Integração',
-                    'Macro da Regina',
-                    'Macro da Folha',
-                    'Macro do Fiscal',
-                    'Formatador de Balancete',
-                    'Manuais');
-            """)
-            produtos = cursor.fetchall()
-            cursor.close()
-            conn.close()
+                # Cria apenas os que ainda não existem
+                faltantes = [m for m in modulos_fixos if m not in nomes_existentes]
+                for nome in faltantes:
+                    cursor.execute(
+                        "INSERT INTO produtos (nome, status, ultimo_acesso) VALUES (%s, 'Pronto', NULL)",
+                        (nome,),
+                    )
+                if faltantes:
+                    conn.commit()
+
+                # Agora busca apenas os 6 fixos
+                cursor.execute("""
+                    SELECT id, nome, status, ultimo_acesso
+                    FROM produtos
+                    WHERE nome IN (
+                        'Controle da Integração',
+                        'Macro da Regina',
+                        'Macro da Folha',
+                        'Macro do Fiscal',
+                        'Formatador de Balancete',
+                        'Manuais'
+                    )
+                    ORDER BY FIELD(nome,
+                        'Controle da Integração',
+                        'Macro da Regina',
+                        'Macro da Folha',
+                        'Macro do Fiscal',
+                        'Formatador de Balancete',
+                        'Manuais');
+                """)
+                produtos = cursor.fetchall()
+                cursor.close()
 
             # Limpa e exibe
             self.tabela_modulos.setRowCount(len(produtos))
@@ -334,11 +376,12 @@ class PainelAdministracao(QtWidgets.QTabWidget):
 
     def atualizar_status(self, produto_id, novo_status):
         try:
-            conn = conectar()
-            cursor = conn.cursor()
-            cursor.execute("UPDATE produtos SET status=%s WHERE id=%s", (novo_status, produto_id))
-            conn.commit()
-            cursor.close()
-            conn.close()
+            with conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE produtos SET status=%s WHERE id=%s", (novo_status, produto_id))
+                conn.commit()
+                cursor.close()
+            # aqui só temos o id: descarta o cache de status de todos os módulos
+            invalidar_status()
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao atualizar status:\n{e}")
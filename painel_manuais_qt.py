@@ -0,0 +1,439 @@
+"""Módulo Manuais em PySide6 (substitui a janela Tk que rodava em thread)."""
+
+import os
+import subprocess
+
+from PySide6 import QtCore, QtWidgets
+
+from database import conectar
+from manuais import (
+    ACESSOS_INTERVALO_S,
+    BUSCA_DEBOUNCE_MS,
+    SQL_BUSCA_MANUAIS,
+    _RE_OPERADORES_FT,
+    busca_fulltext_disponivel,
+    desativar_busca_fulltext,
+    registrar_acesso,
+)
+
+
+_QSS = """
+    QDialog { background-color: #10121B; }
+    QWidget { color: #ffffff; font-family: 'Segoe UI'; font-size: 11pt; }
+    QLabel#Titulo { color: #4ecca3; font-size: 16pt; font-weight: bold; }
+    QLabel#Subtitulo { font-size: 10pt; }
+    QLabel#Rodape { font-size: 9pt; }
+    QLabel#TituloCard { color: #4ecca3; font-size: 12pt; font-weight: bold; }
+    QFrame#Card { background-color: #1b1e2b; border: 1px solid #2a2a4a; }
+    QLineEdit { background-color: #1f2333; border: none; padding: 4px; }
+    QListView {
+        background-color: #1f2333;
+        border: 1px solid #2a2a4a;
+        font-size: 10pt;
+    }
+    QListView::item:selected { background-color: #4ecca3; color: #000000; }
+    QPushButton {
+        background-color: #4ecca3;
+        color: #000000;
+        font-size: 12pt;
+        font-weight: bold;
+        border: none;
+        padding: 8px 12px;
+    }
+    QPushButton:hover { background-color: #6eecc1; }
+    QPushButton#Perigo { background-color: #d63031; color: white; }
+    QPushButton#Perigo:hover { background-color: #ff4d4d; }
+    QPushButton#Azul { background-color: #0984e3; }
+"""
+
+_SQL_CONTEUDO = """
+    SELECT campo1, campo2, campo3, campo4, campo5
+    FROM manuais_conteudo
+    WHERE categoria = %s
+    ORDER BY id ASC;
+"""
+
+# COUNT + MAX(id) mudam sempre que importar_manuais recarrega a categoria
+# (DELETE + LOAD DATA gera ids novos); serve de versão do conteúdo
+_SQL_VERSAO_CONTEUDO = """
+    SELECT COUNT(*), MAX(id)
+    FROM manuais_conteudo
+    WHERE categoria = %s;
+"""
+
+_SQL_TOP_USADOS = """
+    SELECT nome_item, acessos
+    FROM historico_manuais
+    WHERE tipo = %s
+    ORDER BY acessos DESC, ultimo_acesso DESC
+    LIMIT 10;
+"""
+
+
+def _montar_texto(row_dict):
+    partes = []
+    for campo in ["campo1", "campo2", "campo3", "campo4", "campo5"]:
+        valor = row_dict.get(campo)
+        if valor and str(valor).strip():
+            partes.append(str(valor))
+    return " | ".join(partes)
+
+
+def _versao_conteudo(conn, categoria):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(_SQL_VERSAO_CONTEUDO, (categoria,))
+        return tuple(cursor.fetchone())
+    finally:
+        cursor.close()
+
+
+def _buscar_conteudo(conn, categoria):
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(_SQL_CONTEUDO, (categoria,))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _buscar_top_usados(conn, categoria):
+    """Top 10 da categoria usando uma conexão já aberta."""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(_SQL_TOP_USADOS, (categoria,))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+class _ItensModel(QtCore.QAbstractListModel):
+    """Lista de itens de uma categoria, com o texto já em minúsculas
+    guardado num papel próprio (ROLE_LOWER) para o filtro do proxy."""
+
+    ROLE_LOWER = QtCore.Qt.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._itens = ()
+        self._lowered = ()
+
+    def set_itens(self, itens):
+        self.beginResetModel()
+        self._itens = tuple(itens)
+        self._lowered = tuple(map(str.lower, self._itens))
+        self.endResetModel()
+
+    def itens(self):
+        return self._itens
+
+    def rowCount(self, parent=QtCore.QModelIndex()):  # noqa: N802 - API Qt
+        return 0 if parent.isValid() else len(self._itens)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            return self._itens[index.row()]
+        if role == self.ROLE_LOWER:
+            return self._lowered[index.row()]
+        return None
+
+
+class CategoriaWindow(QtWidgets.QDialog):
+    """
+    Janela de uma categoria (CFOP / Lanç. Fiscal):
+    - lado esquerdo: busca + resultados
+    - lado direito: Top usados
+    - rodapé: Voltar + Limpar Top Usados
+    - divisor arrastável (QSplitter)
+    Fechar só esconde a janela; a ManuaisWindow reaproveita a mesma
+    instância (ver atualizar) na próxima vez que a categoria for aberta.
+    """
+
+    def __init__(self, titulo, categoria, registros, versao, top_inicial, parent=None):
+        super().__init__(parent)
+        self._categoria = categoria
+        self._itens = tuple(_montar_texto(r) for r in registros)
+        self.versao = versao
+        self._top_exibido = None
+
+        self.setWindowTitle(titulo)
+
+        # debounce: só consulta quando a digitação para por um instante
+        self._timer_busca = QtCore.QTimer(self)
+        self._timer_busca.setSingleShot(True)
+        self._timer_busca.setInterval(BUSCA_DEBOUNCE_MS)
+        self._timer_busca.timeout.connect(self._executar_busca)
+
+        self._build(titulo)
+        # tamanho só depois dos widgets no layout (um cálculo de geometria)
+        self.resize(1100, 720)
+        self._mostrar_lista(self._itens)
+        self._atualizar_top(top_inicial)
+
+    def _build(self, titulo):
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(10, 10, 10, 12)
+
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Horizontal)
+        splitter.setOpaqueResize(False)
+        splitter.setChildrenCollapsible(False)
+        layout.addWidget(splitter, 1)
+
+        # LEFT - lista principal
+        esquerda = QtWidgets.QFrame()
+        esquerda.setObjectName("Card")
+        esquerda.setMinimumWidth(400)
+        layout_esq = QtWidgets.QVBoxLayout(esquerda)
+        lbl_titulo = QtWidgets.QLabel(titulo)
+        lbl_titulo.setObjectName("TituloCard")
+        layout_esq.addWidget(lbl_titulo)
+
+        self.input_busca = QtWidgets.QLineEdit()
+        # a busca pelo banco casa início de palavra (e traz no máximo
+        # BUSCA_LIMITE linhas); o filtro local casa qualquer trecho
+        if busca_fulltext_disponivel():
+            self.input_busca.setPlaceholderText("Buscar (palavras pelo início: 510 encontra 5102)")
+        else:
+            self.input_busca.setPlaceholderText("Filtrar (qualquer trecho do texto)")
+        self.input_busca.textChanged.connect(lambda _texto: self._timer_busca.start())
+        layout_esq.addWidget(self.input_busca)
+
+        # o filtro local roda no proxy (C++) sobre o papel já minúsculo,
+        # por isso não precisa de CaseInsensitive
+        self.modelo = _ItensModel(self)
+        self.proxy = QtCore.QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.modelo)
+        self.proxy.setFilterRole(_ItensModel.ROLE_LOWER)
+        self.proxy.setFilterCaseSensitivity(QtCore.Qt.CaseSensitive)
+
+        self.lista = QtWidgets.QListView()
+        self.lista.setUniformItemSizes(True)
+        self.lista.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.lista.setModel(self.proxy)
+        self.lista.doubleClicked.connect(self._on_double_click)
+        layout_esq.addWidget(self.lista, 1)
+        splitter.addWidget(esquerda)
+
+        # RIGHT - Top usados
+        direita = QtWidgets.QFrame()
+        direita.setObjectName("Card")
+        direita.setMinimumWidth(300)
+        layout_dir = QtWidgets.QVBoxLayout(direita)
+        lbl_top = QtWidgets.QLabel("Top usados")
+        lbl_top.setObjectName("TituloCard")
+        layout_dir.addWidget(lbl_top)
+
+        # lista só de leitura: QStringListModel recebe tudo num setStringList,
+        # sem um QListWidgetItem por linha
+        self.modelo_top = QtCore.QStringListModel(self)
+        self.lista_top = QtWidgets.QListView()
+        self.lista_top.setUniformItemSizes(True)
+        self.lista_top.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.lista_top.setModel(self.modelo_top)
+        layout_dir.addWidget(self.lista_top, 1)
+        splitter.addWidget(direita)
+
+        # FOOTER (Voltar / Limpar)
+        rodape = QtWidgets.QHBoxLayout()
+        rodape.addStretch()
+        btn_limpar = QtWidgets.QPushButton("Limpar Top Usados")
+        btn_limpar.setObjectName("Perigo")
+        btn_limpar.clicked.connect(self._limpar_top_usados)
+        rodape.addWidget(btn_limpar)
+        btn_voltar = QtWidgets.QPushButton("Voltar")
+        btn_voltar.clicked.connect(self.close)
+        rodape.addWidget(btn_voltar)
+        layout.addLayout(rodape)
+
+    def atualizar(self, rows_top, registros=None, versao=None):
+        """Reabertura: troca o conteúdo só se veio um novo (versão mudou)
+        e reaplica a busca digitada; o Top usados é sempre o recém-lido."""
+        if registros is not None:
+            self._itens = tuple(_montar_texto(r) for r in registros)
+            self.versao = versao
+            self._executar_busca()
+        self._atualizar_top(rows_top)
+
+    # ------------------------------------------------------------------
+    # Busca
+    # ------------------------------------------------------------------
+    def _mostrar_lista(self, itens, filtro=""):
+        # se os itens não mudaram, o modelo fica como está e só o filtro
+        # do proxy é trocado
+        itens = tuple(itens)
+        if itens != self.modelo.itens():
+            self.modelo.set_itens(itens)
+        self.proxy.setFilterFixedString(filtro)
+
+    def _buscar_no_banco(self, termo):
+        """Busca feita pelo MySQL (índice FULLTEXT em campo_busca);
+        cada palavra digitada vira prefixo obrigatório (+palavra*).
+        Sem palavra aproveitável retorna None (fica o filtro local)."""
+        palavras = _RE_OPERADORES_FT.sub(" ", termo).split()
+        if not palavras:
+            return None
+        expressao = " ".join(f"+{p}*" for p in palavras)
+        with conectar() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(SQL_BUSCA_MANUAIS, (self._categoria, expressao))
+            rows = cursor.fetchall()
+            cursor.close()
+        return [_montar_texto(r) for r in rows]
+
+    def _executar_busca(self):
+        termo = self.input_busca.text().strip()
+        resultado = None
+        if termo and busca_fulltext_disponivel():
+            try:
+                resultado = self._buscar_no_banco(termo)
+            except Exception as e:
+                # falhou uma vez: as próximas teclas nem tentam o banco
+                print("ERRO busca manuais (usando filtro local):", e)
+                desativar_busca_fulltext()
+        if resultado is None:
+            # lista completa já está em memória desde a abertura
+            self._mostrar_lista(self._itens, termo.lower())
+        else:
+            self._mostrar_lista(resultado)
+
+    # ------------------------------------------------------------------
+    # Top usados
+    # ------------------------------------------------------------------
+    def _on_double_click(self, index):
+        registrar_acesso(index.data(), self._categoria)
+        # a gravação é em lote na thread de fundo: relê o Top depois dela
+        QtCore.QTimer.singleShot(int(ACESSOS_INTERVALO_S * 1000) + 150, self, self._atualizar_top)
+
+    def _carregar_top_usados(self):
+        try:
+            with conectar() as conn:
+                return _buscar_top_usados(conn, self._categoria)
+        except Exception as e:
+            print("ERRO carregar_top_usados:", e)
+            QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao carregar Top Usados:\n{e}")
+            return []
+
+    def _atualizar_top(self, rows_top=None):
+        if rows_top is None:
+            rows_top = self._carregar_top_usados()
+        if not rows_top:
+            entradas = ("Nenhum acesso ainda",)
+        else:
+            entradas = tuple(f"{r['nome_item']} ({r['acessos']}x)" for r in rows_top)
+        if entradas == self._top_exibido:
+            return
+        self._top_exibido = entradas
+        self.modelo_top.setStringList(list(entradas))
+
+    def _limpar_top_usados(self):
+        try:
+            with conectar() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM historico_manuais WHERE tipo = %s", (self._categoria,))
+                conn.commit()
+                cursor.close()
+            QtWidgets.QMessageBox.information(
+                self, "Limpeza concluída", f"Top usados de '{self._categoria}' limpo!"
+            )
+        except Exception as e:
+            print("ERRO limpar_top_usados:", e)
+            QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao limpar Top Usados:\n{e}")
+        self._atualizar_top()
+
+
+class ManuaisWindow(QtWidgets.QDialog):
+    """
+    Janela principal do módulo Manuais.
+    - Botões: CFOP, Lanç. Fiscal, Manual da Integração (PDF)
+    - Cada botão de categoria abre uma CategoriaWindow
+    O status do módulo é conferido antes, em manuais_bridge.abrir_manuais_via_qt.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("📚 Manuais do Sistema")
+        self.setStyleSheet(_QSS)
+        # janelas de categoria já montadas, reaproveitadas ao reabrir
+        self._categorias: dict[str, CategoriaWindow] = {}
+        self._build()
+        self.setFixedSize(750, 650)
+
+    def _build(self):
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 10)
+        layout.setSpacing(8)
+
+        titulo = QtWidgets.QLabel("Manuais e Materiais de Apoio")
+        titulo.setObjectName("Titulo")
+        titulo.setAlignment(QtCore.Qt.AlignCenter)
+        layout.addWidget(titulo)
+
+        subtitulo = QtWidgets.QLabel("Escolha o material que deseja consultar")
+        subtitulo.setObjectName("Subtitulo")
+        subtitulo.setAlignment(QtCore.Qt.AlignCenter)
+        layout.addWidget(subtitulo)
+        layout.addSpacing(15)
+
+        def botao(texto, slot, nome_objeto=None):
+            btn = QtWidgets.QPushButton(texto)
+            btn.setFixedWidth(320)
+            btn.setCursor(QtCore.Qt.PointingHandCursor)
+            if nome_objeto:
+                btn.setObjectName(nome_objeto)
+            btn.clicked.connect(slot)
+            layout.addWidget(btn, 0, QtCore.Qt.AlignHCenter)
+            return btn
+
+        botao("CFOP", lambda: self._abrir_categoria("CFOP", "CFOP"))
+        botao("Lanç. Fiscal", lambda: self._abrir_categoria("Lanç. Fiscal", "LANC_FISCAL"))
+        botao("Manual da Integração (PDF)", self._abrir_manual_integracao, "Azul")
+        layout.addSpacing(12)
+        botao("⬅ Voltar ao Painel Principal", self.close, "Perigo")
+
+        layout.addStretch(1)
+        rodape = QtWidgets.QLabel("🟢 Conectado • Dados do banco")
+        rodape.setObjectName("Rodape")
+        rodape.setAlignment(QtCore.Qt.AlignCenter)
+        layout.addWidget(rodape)
+
+    def _abrir_categoria(self, titulo, categoria):
+        janela = self._categorias.get(categoria)
+
+        # versão, conteúdo (só se mudou desde a última abertura) e Top usados
+        # na mesma conexão do pool
+        registros = None
+        try:
+            with conectar() as conn:
+                versao = _versao_conteudo(conn, categoria)
+                if janela is None or janela.versao != versao:
+                    registros = _buscar_conteudo(conn, categoria)
+                rows_top = _buscar_top_usados(conn, categoria)
+        except Exception as e:
+            print("ERRO abrir_categoria SELECT manuais_conteudo:", e)
+            QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao carregar dados do banco:\n{e}")
+            return
+
+        if janela is None:
+            janela = CategoriaWindow(titulo, categoria, registros, versao, rows_top, self)
+            self._categorias[categoria] = janela
+        else:
+            janela.atualizar(rows_top, registros, versao)
+        janela.show()
+        janela.raise_()
+        janela.activateWindow()
+
+    def _abrir_manual_integracao(self):
+        pdf_path = os.path.join(os.path.dirname(__file__), "Manual_Integracao.pdf")
+        if not os.path.exists(pdf_path):
+            QtWidgets.QMessageBox.critical(self, "Erro", "Manual_Integracao.pdf não encontrado.")
+            return
+        try:
+            if os.name == "nt":
+                os.startfile(pdf_path)
+            else:
+                subprocess.Popen(["xdg-open", pdf_path])
+        except Exception as e:
+            print("ERRO abrir_manual_integracao:", e)
+            QtWidgets.QMessageBox.critical(self, "Erro", f"Erro ao abrir manual:\n{e}")
@@ -17,6 +17,8 @@ class PainelUser(BasePainelWindow):
         super().__init__(usuario, "Painel do Usuário")
         self._service = ProdutoService()
         self._timer = QtCore.QTimer(self)
+        # refresh a cada 4 s: precisão de segundo basta (VeryCoarseTimer)
+        self._timer.setTimerType(QtCore.Qt.VeryCoarseTimer)
         self._timer.setInterval(self.REFRESH_INTERVAL_MS)
         self._timer.timeout.connect(self._atualizar_produtos)
 
@@ -2,17 +2,64 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Optional
 
-import bcrypt
-
 from database import conectar
 from services.produtos_service import ProdutoService
 
 LOGGER = logging.getLogger(__name__)
 
+# Logins confirmados pelo bcrypt ficam guardados alguns minutos para o mesmo
+# usuário/senha (nova tentativa, relogin após fechar o painel). A chave usa o
+# sha256 da senha, nunca o texto; o cache vive só na memória do processo.
+# Falhas não entram: senão tentativas erradas em massa encheriam o cache.
+_CHECKPW_TTL = 300
+_CHECKPW_MAX = 128
+_checkpw_cache: "OrderedDict[tuple[str, bytes], tuple[float, str | bytes]]" = OrderedDict()
+_checkpw_lock = threading.Lock()
+
+
+def _checkpw(usuario: str, senha: str, senha_hash: str | bytes) -> bool:
+    """``bcrypt.checkpw`` com cache LRU dos acertos por (usuário, sha256 da senha).
+
+    A entrada só vale se o ``senha_hash`` atual do banco for o mesmo de quando
+    foi gravada; troca de senha invalida o cache daquele usuário. O hash pode
+    vir como texto (VARCHAR) ou já em bytes (coluna binária / cursor preparado).
+    """
+
+    senha_bytes = senha.encode("utf-8")
+    chave = (usuario, hashlib.sha256(senha_bytes).digest())
+    agora = time.monotonic()
+
+    with _checkpw_lock:
+        item = _checkpw_cache.get(chave)
+        if item is not None:
+            if agora - item[0] < _CHECKPW_TTL and item[1] == senha_hash:
+                _checkpw_cache.move_to_end(chave)
+                return True
+            del _checkpw_cache[chave]
+
+    # bcrypt (cffi) só é carregado na primeira verificação de senha,
+    # fora do caminho de abertura da tela de login
+    import bcrypt
+
+    hash_bytes = bytes(senha_hash) if isinstance(senha_hash, (bytes, bytearray)) else senha_hash.encode("utf-8")
+    if not bcrypt.checkpw(senha_bytes, hash_bytes):
+        return False
+
+    with _checkpw_lock:
+        _checkpw_cache[chave] = (agora, senha_hash)
+        _checkpw_cache.move_to_end(chave)
+        while len(_checkpw_cache) > _CHECKPW_MAX:
+            _checkpw_cache.popitem(last=False)
+    return True
+
 
 @dataclass(frozen=True)
 class Usuario:
@@ -48,14 +95,15 @@ class UsuarioRepository:
     def __init__(self, connection_factory=conectar):
         self._connection_factory = connection_factory
 
+    # ``usuario`` já é UNIQUE, então a busca usa o índice; LIMIT 1 encerra
+    # a leitura na primeira linha.
+    _SQL_POR_USUARIO = "SELECT id, usuario, nome, tipo, senha_hash FROM usuarios WHERE usuario = %s LIMIT 1"
+
     def buscar_por_usuario(self, username: str) -> Optional[Usuario]:
         with self._connection_factory() as conn:
             cursor = conn.cursor(dictionary=True)
             try:
-                cursor.execute(
-                    "SELECT id, usuario, nome, tipo, senha_hash FROM usuarios WHERE usuario = %s",
-                    (username,),
-                )
+                cursor.execute(self._SQL_POR_USUARIO, (username,))
                 row = cursor.fetchone()
             finally:
                 cursor.close()
@@ -83,7 +131,7 @@ class AuthService:
         if not usuario or not usuario.senha_hash:
             return None
 
-        if not bcrypt.checkpw(password.encode("utf-8"), usuario.senha_hash.encode("utf-8")):
+        if not _checkpw(usuario.usuario, password, usuario.senha_hash):
             return None
 
         if registrar_acesso: